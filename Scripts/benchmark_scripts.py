@@ -0,0 +1,244 @@
+#!/usr/bin/env python
+"""
+Benchmark suite for the scripts that walk the Skills tree.
+Generates synthetic Skills trees of each requested size and times converting, fixing inputs, counting tokens,
+parsing and rendering. Results are saved as JSON and can be compared against a previous run used as a baseline.
+The startup benchmark runs `skills.py <command> --help` for every command under `python -X importtime`, which
+times module imports on their own, so a heavy import creeping back onto a command's startup path shows up as a
+regression.
+"""
+import os
+import io
+import re
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import subprocess
+import contextlib
+
+from generate_synthetic_skills import generate_skill_tree
+import instrumentation
+
+DEFAULT_SIZES = (100, 10000, 100000)
+REGRESSION_TOLERANCE = 0.10
+SKILLS_CLI = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'skills.py')
+IMPORT_TIME_PATTERN = re.compile(r'^import time:\s+\d+ \|\s+(\d+) \| (\S.*)$')
+SLOWEST_IMPORTS = 3
+
+
+def time_call(function, repeat=1, setup=None):
+    """Run function repeat times (calling setup before each run) and return the fastest time in seconds."""
+    best = None
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            function()
+            elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def bench_convert(legacy_dir, work_dir, repeat, workers):
+    """Time a full conversion and an incremental rerun of convert_to_skill_format.search_directories."""
+    from convert_to_skill_format import search_directories
+    output_dir = os.path.join(work_dir, 'converted')
+
+    def reset():
+        shutil.rmtree(output_dir, ignore_errors=True)
+        os.makedirs(output_dir)
+
+    results = {'convert_full': time_call(lambda: search_directories(legacy_dir, output_dir, workers), repeat, reset)}
+    results['convert_incremental'] = time_call(lambda: search_directories(legacy_dir, output_dir, workers), repeat)
+    return results
+
+def bench_fix_inputs(skill_dir, repeat):
+    """Time fix_skill_inputs.fix_skill_file over every .skill file."""
+    from fix_skill_inputs import fix_skill_file
+    from skill_registry import iter_skill_files
+    paths = list(iter_skill_files(skill_dir))
+
+    def run():
+        for path in paths:
+            fix_skill_file(path)
+
+    return {'fix_inputs': time_call(run, repeat)}
+
+def bench_token_counter(skill_dir, work_dir, repeat, workers):
+    """Time token_counter.search_directory without a cache, and again with a warm cache."""
+    import token_counter
+    cache_path = os.path.join(work_dir, 'token_cache.json')
+    token_counter.get_token_encodings()
+    results = {'token_count': time_call(lambda: token_counter.search_directory(skill_dir, workers=workers), repeat)}
+    token_counter.search_directory(skill_dir, workers=workers, cache_path=cache_path)
+    results['token_count_cached'] = time_call(
+        lambda: token_counter.search_directory(skill_dir, workers=workers, cache_path=cache_path), repeat)
+    return results
+
+def bench_parse_render(skill_dir, repeat):
+    """Time indexing the tree, loading every prompt body, compiling every template and rendering each skill."""
+    from skill_registry import load_registry
+    from skill_template import SkillRenderer, compile_skill
+    registry = load_registry(skill_dir)
+    entries = list(registry)
+    renderer = SkillRenderer(registry)
+    for entry in entries:
+        renderer.get_template(entry.key)
+    rows = [{'input': 'benchmark input', 'history': 'User: hi\nBot: hello'}] * 10
+
+    def render():
+        for entry in entries:
+            renderer.render_batch(entry.key, rows)
+
+    return {
+        'index': time_call(lambda: load_registry(skill_dir), repeat),
+        'load_prompts': time_call(lambda: [entry.read_prompt() for entry in entries], repeat),
+        'compile': time_call(lambda: [compile_skill(entry) for entry in entries], repeat),
+        'render_10_each': time_call(render, repeat),
+    }
+
+def get_import_times(stderr, exclude=()):
+    """Parse -X importtime output into {module: cumulative seconds} for the modules imported at the top level."""
+    times = {}
+    for line in stderr.splitlines():
+        match = IMPORT_TIME_PATTERN.match(line)
+        if match and match.group(2) not in exclude:
+            times[match.group(2)] = int(match.group(1)) / 1e6
+    return times
+
+def run_importtime(args):
+    """Run a fresh interpreter under -X importtime. Returns (wall seconds, stderr)."""
+    start = time.perf_counter()
+    process = subprocess.run([sys.executable, '-X', 'importtime'] + args,
+                             stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    wall = time.perf_counter() - start
+    if process.returncode != 0:
+        raise RuntimeError(f"{' '.join(args)} exited with status {process.returncode}")
+    return wall, process.stderr
+
+def bench_startup(repeat):
+    """
+    Time `skills.py <command> --help` for every command in a fresh interpreter.
+    Records the wall time and the total top-level import time of each command, not counting the modules a bare
+    interpreter imports at startup, and prints its slowest imports.
+    """
+    from skills import COMMANDS
+    interpreter = get_import_times(run_importtime(['-c', 'pass'])[1])
+    results = {}
+    for name in COMMANDS:
+        best_wall = best_imports = None
+        for _ in range(repeat):
+            wall, stderr = run_importtime([SKILLS_CLI, name, '--help'])
+            imports = get_import_times(stderr, interpreter)
+            if best_wall is None or wall < best_wall:
+                best_wall, best_imports = wall, imports
+        slowest = sorted(best_imports.items(), key=lambda item: -item[1])[:SLOWEST_IMPORTS]
+        print(f"  {name}: slowest imports " + ', '.join(f"{module} {seconds * 1000:.1f}ms" for module, seconds in slowest))
+        results[f'startup_{name}'] = best_wall
+        results[f'imports_{name}'] = sum(best_imports.values())
+    return results
+
+def run_size(size, work_root, repeat, workers, benchmarks):
+    """Generate trees with size skills and run the selected benchmarks on them."""
+    work_dir = tempfile.mkdtemp(prefix=f'skills_{size}_', dir=work_root)
+    legacy_dir = os.path.join(work_dir, 'legacy')
+    skill_dir = os.path.join(work_dir, 'skills')
+    results = {}
+    try:
+        start = time.perf_counter()
+        generate_skill_tree(legacy_dir, size, 'legacy')
+        generate_skill_tree(skill_dir, size, 'skill')
+        print(f"Generated {size} skills in {time.perf_counter() - start:.1f}s")
+
+        suite = {
+            'convert': lambda: bench_convert(legacy_dir, work_dir, repeat, workers),
+            'fix': lambda: bench_fix_inputs(skill_dir, repeat),
+            'tokens': lambda: bench_token_counter(skill_dir, work_dir, repeat, workers),
+            'parse': lambda: bench_parse_render(skill_dir, repeat),
+        }
+        for name in benchmarks:
+            try:
+                timings = suite[name]()
+            except Exception as e:
+                print(f"  {name}: skipped ({type(e).__name__}: {e})")
+                results[name] = {'skipped': str(e)}
+                continue
+            for key, seconds in timings.items():
+                print(f"  {key}: {seconds:.4f}s")
+            results.update(timings)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+def compare_results(results, baseline, tolerance=REGRESSION_TOLERANCE):
+    """
+    Compare timings against a baseline. Returns a list of (size, benchmark, baseline, current, ratio, regression),
+    where regression is True for timings slower than baseline * (1 + tolerance).
+    """
+    comparison = []
+    for size, timings in results['results'].items():
+        base_timings = baseline.get('results', {}).get(size, {})
+        for name, seconds in timings.items():
+            base = base_timings.get(name)
+            if not isinstance(seconds, float) or not isinstance(base, float) or base <= 0:
+                continue
+            comparison.append((size, name, base, seconds, seconds / base, seconds > base * (1 + tolerance)))
+    return comparison
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Skills scripts on synthetic trees.")
+    parser.add_argument("--sizes", type=int, nargs='+', default=list(DEFAULT_SIZES), help="Numbers of skills to benchmark with.")
+    parser.add_argument("--benchmarks", nargs='+', choices=('convert', 'fix', 'tokens', 'parse', 'startup'),
+                        default=['convert', 'fix', 'tokens', 'parse', 'startup'], help="Benchmarks to run. startup runs once, not per size.")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per benchmark. The fastest run is reported.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes for the scripts that use a pool.")
+    parser.add_argument("--work_dir", default=None, help="Directory for the synthetic trees. Defaults to the system temp directory.")
+    parser.add_argument("-o", "--output", default="benchmark_results.json", help="File to save the results to.")
+    parser.add_argument("--baseline", default=None, help="Results file from a previous run to compare against.")
+    parser.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE, help="Slowdown ratio above which a benchmark counts as a regression.")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    instrumentation.setup(args)
+
+    results = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'repeat': args.repeat,
+            'workers': args.workers,
+        },
+        'results': {},
+    }
+    tree_benchmarks = [name for name in args.benchmarks if name != 'startup']
+    if 'startup' in args.benchmarks:
+        print("Benchmarking startup")
+        results['results']['startup'] = bench_startup(args.repeat)
+        for key, seconds in results['results']['startup'].items():
+            print(f"  {key}: {seconds:.4f}s")
+    for size in args.sizes if tree_benchmarks else ():
+        print(f"Benchmarking {size} skills")
+        results['results'][str(size)] = run_size(size, args.work_dir, args.repeat, args.workers, tree_benchmarks)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = 0
+        for size, name, base, current, ratio, regression in compare_results(results, baseline, args.tolerance):
+            flag = '  REGRESSION' if regression else ''
+            regressions += regression
+            print(f"{size:>8} {name:<22} {base:9.4f}s -> {current:9.4f}s  x{ratio:.2f}{flag}")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+"""
+Sliding-window history for chat skills such as Chat/chat.skill.
+Every message is tokenized once when it is added, and a running sum of the counts is kept, so each turn only
+tokenizes the new messages and the prompt windows around the other inputs (see prompt_cost.py).
+The longest suffix of the conversation that fits the skill's budget
+(context window - prompt without history - max_tokens) is then found by binary search over the running sum.
+
+Messages are joined with newlines. When {{$history}} sits on its own line in the prompt and every message starts
+with a non-whitespace character, each message is tokenized independently of its neighbours and the count is exact.
+Otherwise it can be off by the tokens spanning the edges of each message.
+"""
+import sys
+import json
+import bisect
+import argparse
+
+from skill_registry import load_registry
+from prompt_cost import SkillCostEstimator, DEFAULT_MAX_TOKENS, get_context_window
+import instrumentation
+
+HISTORY_INPUT = 'history'
+HISTORY_SEPARATOR = '\n'
+# Short message used to measure the prompt around a non-empty history.
+PROBE_MESSAGE = 'x'
+
+
+class ChatHistory:
+    """Messages of one conversation with cached token counts, trimmed to fit a chat skill's prompt."""
+
+    def __init__(self, estimator, key, history_input=HISTORY_INPUT, context_window=None):
+        self.estimator = estimator
+        self.key = key
+        self.history_input = history_input
+        self.context_window = context_window
+        self.messages = []
+        self.tokens = []
+        # totals[i] is the token count of the first i messages.
+        self.totals = [0]
+        self.probe_tokens = self.count_message(PROBE_MESSAGE)
+
+    def count_message(self, message):
+        """Tokens a message adds to the history, including its separator."""
+        return len(self.estimator.get_model(self.key).encoding.encode_ordinary(message + HISTORY_SEPARATOR))
+
+    def append(self, message):
+        """Add a message to the end of the conversation."""
+        tokens = self.count_message(message)
+        self.messages.append(message)
+        self.tokens.append(tokens)
+        self.totals.append(self.totals[-1] + tokens)
+
+    def add_turn(self, speaker, text):
+        """Add a message in the "Name:text" form the chat skills use."""
+        self.append(f"{speaker}:{text}")
+
+    def extend(self, messages):
+        for message in messages:
+            self.append(message)
+
+    def get_limit(self, values=None):
+        """Return (limit, fixed): the tokens available to the history, and the prompt tokens without it."""
+        settings = self.estimator.registry.get(self.key).settings
+        max_tokens = settings.get('max_tokens', DEFAULT_MAX_TOKENS)
+        if not isinstance(max_tokens, int):
+            max_tokens = DEFAULT_MAX_TOKENS
+        context_window = self.context_window or get_context_window(settings.get('model'))
+        values = dict(values or {})
+        values[self.history_input] = PROBE_MESSAGE
+        fixed = self.estimator.count(self.key, values) - self.probe_tokens
+        return context_window - max_tokens - fixed, fixed
+
+    def get_start(self, limit):
+        """Index of the oldest message in the longest suffix whose tokens fit within limit."""
+        total = self.totals[-1]
+        return bisect.bisect_left(self.totals, total - limit) if limit >= 0 else len(self.messages)
+
+    def get_window(self, values=None):
+        """The most recent messages that fit the skill's budget given the other input values."""
+        limit, _ = self.get_limit(values)
+        return self.messages[self.get_start(limit):]
+
+    def fit(self, values=None):
+        """
+        Fill the history input with the longest suffix that fits.
+        Returns (values, prompt_tokens, dropped): the input values with the history set, the prompt's token count
+        and how many of the oldest messages were left out.
+        """
+        limit, fixed = self.get_limit(values)
+        start = self.get_start(limit)
+        values = dict(values or {})
+        values[self.history_input] = HISTORY_SEPARATOR.join(self.messages[start:])
+        if start == len(self.messages):
+            prompt_tokens = self.estimator.count(self.key, values)
+        else:
+            prompt_tokens = fixed + self.totals[-1] - self.totals[start]
+        return values, prompt_tokens, start
+
+    def __len__(self):
+        return len(self.messages)
+
+def main():
+    parser = argparse.ArgumentParser(description="Trim a chat transcript to the longest recent part that fits a chat skill.")
+    parser.add_argument("--skills", required=True, help="Path to directory containing .skill files.")
+    parser.add_argument("--skill", default="Chat.chat", help="Dotted key of the chat skill.")
+    parser.add_argument("--transcript", required=True, help="Text file with one message per line, oldest first.")
+    parser.add_argument("--inputs", help="JSON object of the other input values.")
+    parser.add_argument("--context_window", type=int, default=None, help="Override the model's context window.")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    instrumentation.setup(args)
+
+    registry = load_registry(args.skills)
+    if args.skill not in registry:
+        print(f"Skill {args.skill} not found.")
+        sys.exit(1)
+    history = ChatHistory(SkillCostEstimator(registry), args.skill, context_window=args.context_window)
+    with open(args.transcript, 'r', encoding='utf-8') as f:
+        history.extend(line.rstrip('\n') for line in f if line.strip())
+    values, prompt_tokens, dropped = history.fit(json.loads(args.inputs) if args.inputs else {})
+    print(f"Kept {len(history) - dropped} of {len(history)} messages, prompt uses {prompt_tokens} tokens.")
+    sys.stdout.write(values[HISTORY_INPUT] + '\n')
+
+if __name__ == "__main__":
+    main()
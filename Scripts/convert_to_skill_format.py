@@ -2,14 +2,28 @@
 """
 Script to convert skills from the three-file format (config.json, description.toml, skprompt.txt)
 to the .skill format, organizing them in a new directory structure.
+Runs incrementally: a manifest in the output directory records the hash and mtime of every source,
+so only skills that changed since the last run are converted or copied.
 """
 import os
 import json
-import toml
 import argparse
 import shutil
+import hashlib
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+import instrumentation
+from instrumentation import phase
+
+SKILL_FILES = ('config.json', 'description.toml', 'skprompt.txt')
+MANIFEST_FILE = '.skill_manifest.json'
+MANIFEST_VERSION = 1
+
+# Mode a plain open() would give a new file, read from the umask on the first write.
+file_mode = None
+
 def read_file(file_path):
     """Read file content."""
     try:
@@ -25,9 +39,87 @@ def has_skill_files(directory):
             os.path.isfile(os.path.join(directory, 'description.toml')) and
             os.path.isfile(os.path.join(directory, 'skprompt.txt')))
 
+def get_file_mode():
+    """Mode for new files under the current umask. Temp files are created private, so written files are given this."""
+    global file_mode
+    if file_mode is None:
+        umask = os.umask(0)
+        os.umask(umask)
+        file_mode = 0o666 & ~umask
+    return file_mode
+
+def write_file_atomic(file_path, content):
+    """Write content to a temp file next to file_path and rename it into place, so readers never see a partial file."""
+    directory = os.path.dirname(file_path)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as temp_file:
+            temp_file.write(content)
+        os.chmod(temp_path, get_file_mode())
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def copy_file_atomic(src_path, dst_path):
+    """Copy a file (with metadata) through a temp file and rename it into place."""
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(dst_path), prefix='.', suffix='.tmp')
+    os.close(fd)
+    try:
+        shutil.copy2(src_path, temp_path)
+        os.replace(temp_path, dst_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def get_source_paths(source):
+    """Get the files a source depends on: the .skill file itself or the three files of a skill folder."""
+    if source.endswith('.skill'):
+        return [source]
+    return [os.path.join(source, file) for file in SKILL_FILES]
+
+def get_source_stats(source):
+    """Get the (mtime, size) of every file a source depends on."""
+    stats = []
+    for path in get_source_paths(source):
+        stat = os.stat(path)
+        stats.append([stat.st_mtime_ns, stat.st_size])
+    return stats
+
+def get_source_hash(source):
+    """Hash the content of every file a source depends on."""
+    digest = hashlib.sha256()
+    for path in get_source_paths(source):
+        digest.update(os.path.basename(path).encode('utf-8'))
+        with open(path, 'rb') as f:
+            digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()
+
+def load_manifest(output_dir):
+    """Load the manifest of previously converted sources from the output directory."""
+    manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+    if not os.path.isfile(manifest_path):
+        return {}
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable manifest {manifest_path}: {e}")
+        return {}
+    if manifest.get('version') != MANIFEST_VERSION:
+        return {}
+    return manifest.get('sources', {})
+
+def save_manifest(output_dir, sources):
+    """Save the manifest of converted sources to the output directory."""
+    manifest = {'version': MANIFEST_VERSION, 'sources': sources}
+    write_file_atomic(os.path.join(output_dir, MANIFEST_FILE), json.dumps(manifest, indent=1, sort_keys=True))
 
 def convert_skill(directory, output_dir, base_dir):
     """Convert a skill directory to .skill format."""
+    import toml
     print(f"Converting: {directory}")
     
     # Read files
@@ -112,41 +204,119 @@ def convert_skill(directory, output_dir, base_dir):
     skill_filename = os.path.join(target_dir, f"{skill_name}.skill")
 
     try:
-        with open(skill_filename, 'w', encoding='utf-8') as skill_file:
-            skill_file.write(skill_content)
+        write_file_atomic(skill_filename, skill_content)
         print(f"Created: {skill_filename}")
         return True
     except Exception as e:
         print(f"Error writing {skill_filename}: {e}")
         return False
 
-def search_directories(base_dir, output_dir):
-    """Recursively search directories for skills to convert."""
-    converted_count = 0
-    skipped_count = 0
-    
+def get_output_path(source, output_dir, base_dir):
+    """Get the file a source is converted or copied to."""
+    if source.endswith('.skill'):
+        return os.path.join(output_dir, os.path.relpath(source, base_dir))
+    rel_parent = os.path.relpath(os.path.dirname(source), base_dir)
+    return os.path.join(output_dir, rel_parent, f"{os.path.basename(source).lower()}.skill")
+
+def find_sources(base_dir, ignore=()):
+    """Find every .skill file and three-file skill folder under the base directory, skipping the ignored directories."""
+    ignore = set(os.path.abspath(path) for path in ignore)
+    sources = []
     for root, dirs, files in os.walk(base_dir):
-        # Move any .skill files found
-        for file in files:
+        dirs[:] = sorted(name for name in dirs if os.path.abspath(os.path.join(root, name)) not in ignore)
+        for file in sorted(files):
             if file.endswith('.skill'):
-                rel_parent = os.path.relpath(root, base_dir)
-                target_dir = os.path.join(output_dir, rel_parent)
-                os.makedirs(target_dir, exist_ok=True)
-                src_path = os.path.join(root, file)
-                dst_path = os.path.join(target_dir, file)
-                try:
-                    shutil.copy2(src_path, dst_path)
-                    print(f"Moved: {src_path} -> {dst_path}")
-                except Exception as e:
-                    print(f"Error moving {src_path}: {e}")
-        # Convert skill folders
+                sources.append(os.path.join(root, file))
         if has_skill_files(root):
-            success = convert_skill(root, output_dir, base_dir)
-            if success:
-                converted_count += 1
-            else:
-                skipped_count += 1
-    
+            sources.append(root)
+    return sources
+
+def process_source(source, output_dir, base_dir, previous_hash=None):
+    """
+    Convert or copy a single source unless its content hash matches the previous run.
+    Returns (status, source_hash) where status is "converted", "copied", "unchanged" or "failed".
+    """
+    try:
+        source_hash = get_source_hash(source)
+    except OSError as e:
+        print(f"Error reading {source}: {e}")
+        return 'failed', None
+    output_path = get_output_path(source, output_dir, base_dir)
+    if source_hash == previous_hash and os.path.isfile(output_path):
+        return 'unchanged', source_hash
+
+    if not source.endswith('.skill'):
+        success = convert_skill(source, output_dir, base_dir)
+        return ('converted' if success else 'failed'), source_hash
+
+    if os.path.abspath(source) == os.path.abspath(output_path):
+        return 'unchanged', source_hash
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    try:
+        copy_file_atomic(source, output_path)
+        print(f"Moved: {source} -> {output_path}")
+        return 'copied', source_hash
+    except Exception as e:
+        print(f"Error moving {source}: {e}")
+        return 'failed', None
+
+def search_directories(base_dir, output_dir, workers=None, incremental=True, ignore=()):
+    """
+    Recursively search directories for skills to convert.
+    With incremental set, sources whose mtime, size or content hash match the manifest are skipped.
+    Sources are processed across a pool of worker processes. Directories in ignore are not searched.
+    """
+    converted_count = 0
+    skipped_count = 0
+    unchanged_count = 0
+
+    manifest = load_manifest(output_dir) if incremental else {}
+    new_manifest = {}
+    pending = []
+    with phase('walk'):
+        sources = list(find_sources(base_dir, ignore))
+    for source in sources:
+        key = os.path.relpath(source, base_dir)
+        previous = manifest.get(key)
+        try:
+            stats = get_source_stats(source)
+        except OSError as e:
+            print(f"Error reading {source}: {e}")
+            skipped_count += 1
+            continue
+        output_path = get_output_path(source, output_dir, base_dir)
+        if previous and previous.get('stats') == stats and os.path.isfile(output_path):
+            new_manifest[key] = previous
+            unchanged_count += 1
+            continue
+        pending.append((key, source, stats, previous.get('hash') if previous else None))
+
+    with phase('convert'):
+        if workers == 1 or len(pending) <= 1:
+            results = [process_source(source, output_dir, base_dir, previous_hash)
+                       for _, source, _, previous_hash in pending]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(process_source, source, output_dir, base_dir, previous_hash)
+                           for _, source, _, previous_hash in pending]
+                results = [future.result() for future in futures]
+
+    for (key, source, stats, _), (status, source_hash) in zip(pending, results):
+        if status == 'failed':
+            skipped_count += 1
+            continue
+        if status == 'converted':
+            converted_count += 1
+        elif status == 'unchanged':
+            unchanged_count += 1
+        new_manifest[key] = {'hash': source_hash, 'stats': stats}
+
+    with phase('write'):
+        save_manifest(output_dir, new_manifest)
+    instrumentation.count('skills_converted', converted_count)
+    instrumentation.count('skills_unchanged', unchanged_count)
+    instrumentation.count('skills_skipped', skipped_count)
+    print(f"Unchanged skills: {unchanged_count}")
     return converted_count, skipped_count
 
 def main():
@@ -155,7 +325,13 @@ def main():
                         help="Base directory to search for skills (e.g., ./Skills)")
     parser.add_argument("-o", "--output", required=True,
                         help="Output directory for .skill files (e.g., ./ConvertedSkills)")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="Number of worker processes. Defaults to the CPU count.")
+    parser.add_argument("--full", action="store_true",
+                        help="Ignore the manifest and convert/copy every skill.")
+    instrumentation.add_arguments(parser)
     args = parser.parse_args()
+    instrumentation.setup(args)
 
     # Get absolute paths
     base_dir = os.path.abspath(args.input)
@@ -173,7 +349,7 @@ def main():
     os.makedirs(output_dir, exist_ok=True)
 
     # Place .skill files directly in output_dir, not in a subfolder
-    converted, skipped = search_directories(base_dir, output_dir)
+    converted, skipped = search_directories(base_dir, output_dir, args.workers, not args.full)
     print(f"\nConversion complete!")
     print(f"Skills converted: {converted}")
     print(f"Skills skipped: {skipped}")
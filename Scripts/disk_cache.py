@@ -0,0 +1,131 @@
+"""
+A small content-addressed cache stored as JSON files on disk.
+Entries are keyed by a hash, evicted least recently used first once the cache grows past its size limit.
+"""
+import os
+import json
+import hashlib
+import tempfile
+import threading
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# Evict down to this fraction of the limit so a full cache is not rescanned on every write.
+EVICTION_RATIO = 0.9
+
+
+def make_cache_key(*parts):
+    """Hash any JSON-serializable parts into a cache key."""
+    payload = json.dumps(parts, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class DiskCache:
+    """
+    Directory of JSON entries named by their key, sharded by the first two characters.
+    Reading an entry refreshes its mtime, which is what eviction uses to find the least recently used entries.
+    Every method takes the cache's own lock, so one instance can be shared between threads.
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = os.path.abspath(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        # Reentrant because set() evicts with the lock held.
+        self.lock = threading.RLock()
+        os.makedirs(self.directory, exist_ok=True)
+        self.size = sum(size for _, _, size in self.iter_entries())
+
+    def get_path(self, key):
+        """Get the file that stores an entry."""
+        return os.path.join(self.directory, key[:2], key + '.json')
+
+    def iter_entries(self):
+        """Yield (path, mtime, size) for every entry in the cache."""
+        for root, _, files in os.walk(self.directory):
+            for file in files:
+                if not file.endswith('.json'):
+                    continue
+                path = os.path.join(root, file)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield path, stat.st_mtime, stat.st_size
+
+    def get(self, key):
+        """Get an entry, or None if it is not cached."""
+        with self.lock:
+            path = self.get_path(key)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    value = json.load(f)
+            except (OSError, ValueError):
+                self.misses += 1
+                return None
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """Store an entry, evicting old entries if the cache is over its size limit."""
+        with self.lock:
+            path = self.get_path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            data = json.dumps(value).encode('utf-8')
+            try:
+                previous = os.path.getsize(path)
+            except OSError:
+                previous = 0
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                os.replace(temp_path, path)
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+            self.size += len(data) - previous
+            if self.size > self.max_bytes:
+                self.evict()
+
+    def delete(self, key):
+        """Remove an entry if it exists."""
+        with self.lock:
+            path = self.get_path(key)
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+            except OSError:
+                return False
+            self.size -= size
+            return True
+
+    def evict(self):
+        """Remove least recently used entries until the cache is back under its size limit."""
+        with self.lock:
+            entries = sorted(self.iter_entries(), key=lambda entry: entry[1])
+            self.size = sum(size for _, _, size in entries)
+            target = self.max_bytes * EVICTION_RATIO
+            for path, _, size in entries:
+                if self.size <= target:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                self.size -= size
+
+    def clear(self):
+        """Remove every entry."""
+        with self.lock:
+            for path, _, _ in list(self.iter_entries()):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self.size = 0
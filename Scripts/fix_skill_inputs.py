@@ -1,61 +1,161 @@
 #!/usr/bin/env python
 """
 Script to correct input variable names in .skill files by extracting {{$var}} from the skill prompt and updating the inputs section to match their exact spelling/capitalization.
+Files are parsed section by section and only the name lines of the inputs section are rewritten.
+Files that are already correct are never written, so their mtimes are left alone.
 """
 import os
 import re
+import sys
+import difflib
 import argparse
+from concurrent.futures import ProcessPoolExecutor
 
-def extract_vars_from_prompt(skill_content):
-    """Extract all {{$var}} from the skill: | section."""
-    skill_section = re.search(r'skill:\s*\|\n((?:\s{2,}.*\n)+)', skill_content)
-    if not skill_section:
-        return []
-    prompt = skill_section.group(1)
-    # Find all {{$var}}
-    vars_found = re.findall(r'\{\{\$(.*?)\}\}', prompt)
-    # Remove duplicates, preserve order
+from skill_registry import PROMPT_KEY, iter_skill_files, split_sections
+from skill_template import VARIABLE_PATTERN
+from convert_to_skill_format import write_file_atomic
+import instrumentation
+from instrumentation import phase
+
+INPUT_NAME_PATTERN = re.compile(r'^(\s*-\s*name:[ \t]*)(.*?)([ \t]*)(\r?\n)?$')
+
+
+def normalize_var_name(name):
+    """Reduce a variable name to a form that ignores capitalization and stray {{$ }} characters."""
+    return re.sub(r'[\s{}$]', '', name).lower()
+
+def extract_vars_from_lines(lines, sections):
+    """Extract all {{$var}} from the skill: | section, without duplicates, in order of appearance."""
     seen = set()
     result = []
-    for v in vars_found:
-        if v not in seen:
-            seen.add(v)
-            result.append(v)
+    for key, _, start, end in sections:
+        if key != PROMPT_KEY:
+            continue
+        for line in lines[start + 1:end]:
+            for var in VARIABLE_PATTERN.findall(line):
+                if var not in seen:
+                    seen.add(var)
+                    result.append(var)
     return result
 
-def fix_skill_file(skill_path):
-    """Update input names in .skill file to match vars in prompt."""
-    with open(skill_path, 'r', encoding='utf-8') as f:
+def extract_vars_from_prompt(skill_content):
+    """Extract all {{$var}} from the skill: | section."""
+    lines = skill_content.splitlines(keepends=True)
+    return extract_vars_from_lines(lines, split_sections(lines))
+
+def match_input_names(input_names, vars_in_prompt):
+    """
+    Map each input name to the prompt variable it refers to.
+    Names that already match exactly are kept. Others are matched to an unclaimed variable that is
+    equal after normalizing capitalization and stray braces. Inputs without a match are left unchanged.
+    """
+    claimed = set(name for name in input_names if name in vars_in_prompt)
+    candidates = {}
+    for var in vars_in_prompt:
+        if var not in claimed:
+            candidates.setdefault(normalize_var_name(var), var)
+    renames = {}
+    for name in input_names:
+        if name in vars_in_prompt:
+            continue
+        var = candidates.get(normalize_var_name(name))
+        if var is not None and var not in claimed:
+            claimed.add(var)
+            renames[name] = var
+    return renames
+
+def fix_skill_content(content):
+    """Return the content with the names in the inputs section corrected. Only inputs name lines are changed."""
+    lines = content.splitlines(keepends=True)
+    sections = split_sections(lines)
+    vars_in_prompt = extract_vars_from_lines(lines, sections)
+    if not vars_in_prompt:
+        return content, vars_in_prompt
+
+    name_lines = []
+    for key, _, start, end in sections:
+        if key != 'inputs':
+            continue
+        for index in range(start + 1, end):
+            match = INPUT_NAME_PATTERN.match(lines[index])
+            if match:
+                name_lines.append((index, match))
+
+    renames = match_input_names([match.group(2).strip('"\'') for _, match in name_lines], vars_in_prompt)
+    if not renames:
+        return content, vars_in_prompt
+    for index, match in name_lines:
+        name = match.group(2).strip('"\'')
+        if name in renames:
+            lines[index] = f"{match.group(1)}{renames[name]}{match.group(3)}{match.group(4) or ''}"
+    return ''.join(lines), vars_in_prompt
+
+def fix_skill_file(skill_path, write=True, diff=False):
+    """
+    Update input names in .skill file to match vars in prompt.
+    Returns (status, diff_text) where status is "fixed", "unchanged" or "novars". The file is only written when it changed.
+    """
+    with phase('read'), open(skill_path, 'r', encoding='utf-8', newline='') as f:
         content = f.read()
-    vars_in_prompt = extract_vars_from_prompt(content)
+    with phase('parse'):
+        new_content, vars_in_prompt = fix_skill_content(content)
     if not vars_in_prompt:
-        print(f"No vars found in prompt for {skill_path}")
-        return
-    # Replace input names in order
-    def repl(match):
-        idx = repl.counter
-        if idx < len(vars_in_prompt):
-            name = vars_in_prompt[idx]
+        return 'novars', None
+    if new_content == content:
+        return 'unchanged', None
+    diff_text = None
+    if diff:
+        diff_text = ''.join(difflib.unified_diff(
+            content.splitlines(keepends=True), new_content.splitlines(keepends=True),
+            fromfile=skill_path, tofile=skill_path))
+    if write:
+        with phase('write'):
+            write_file_atomic(skill_path, new_content)
+    return 'fixed', diff_text
+
+def fix_skill_files(skill_paths, write=True, diff=False, workers=None):
+    """Fix many .skill files across a pool of worker processes. Returns a list of (path, status, diff_text)."""
+    with phase('fix'):
+        if workers == 1 or len(skill_paths) <= 1:
+            results = [fix_skill_file(path, write, diff) for path in skill_paths]
         else:
-            name = match.group(1)  # fallback
-        repl.counter += 1
-        return f"  - name: {name}\n"
-    repl.counter = 0
-    new_content = re.sub(r"  - name: (\w+)\n", repl, content)
-    with open(skill_path, 'w', encoding='utf-8') as f:
-        f.write(new_content)
-    print(f"Fixed: {skill_path}")
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(fix_skill_file, path, write, diff) for path in skill_paths]
+                results = [future.result() for future in futures]
+    instrumentation.count('skill_files', len(skill_paths))
+    return [(path, status, diff_text) for path, (status, diff_text) in zip(skill_paths, results)]
 
 def main():
     parser = argparse.ArgumentParser(description="Fix input variable names in .skill files using vars from skill prompt.")
     parser.add_argument("--skills", required=True, help="Path to directory containing .skill files.")
+    parser.add_argument("--check", action="store_true", help="Do not write files. Exit with status 1 if any file needs fixing.")
+    parser.add_argument("--diff", action="store_true", help="Do not write files. Print a unified diff of the changes.")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes. Defaults to the CPU count.")
+    instrumentation.add_arguments(parser)
     args = parser.parse_args()
+    instrumentation.setup(args)
     skills_dir = os.path.abspath(args.skills)
-    for root, dirs, files in os.walk(skills_dir):
-        for file in files:
-            if file.endswith('.skill'):
-                skill_path = os.path.join(root, file)
-                fix_skill_file(skill_path)
+    write = not (args.check or args.diff)
+
+    with phase('walk'):
+        skill_paths = list(iter_skill_files(skills_dir))
+    results = fix_skill_files(skill_paths, write, args.diff, args.workers)
+    changed = 0
+    for skill_path, status, diff_text in results:
+        if status == 'novars':
+            print(f"No vars found in prompt for {skill_path}")
+        elif status == 'fixed':
+            changed += 1
+            if diff_text:
+                sys.stdout.write(diff_text)
+            elif write:
+                print(f"Fixed: {skill_path}")
+            else:
+                print(f"Would fix: {skill_path}")
+
+    print(f"{changed} of {len(results)} files {'fixed' if write else 'need fixing'}.")
+    if args.check and changed:
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
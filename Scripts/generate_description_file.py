@@ -19,18 +19,52 @@ argument_sources = "A 1 sentence description of where the argument could come fr
 argument_type = "The expected type of the argument, such as string, number, list, etc. as mime types. Invented types are allowed."
 
 The description file is saved in the same directory as the skprompt.txt file as skill_description.toml.
+
+With --concurrency, skills found by --auto_search are described concurrently with asyncio. In-flight requests
+are capped, requests are paced to a tokens-per-minute budget and transient API errors are retried with backoff.
+Set OPENAI_API_BASE in .env to point the script at a different (e.g. local stub) completion server.
+
+Completions are cached on disk, keyed on the injected prompt, model, temperature and max_tokens, so reruns with
+an identical prompt reuse the stored completion instead of calling the model again. Completions that failed
+validation are kept in the cache with the reason but never reused, so the next run asks the model again.
+
+openai, ruamel.yaml, dotenv and toml are imported by the functions that use them, so --debug runs and imports
+of this module from other scripts do not pay for them. The .env settings are loaded once per process.
 """
-from ruamel.yaml.scalarstring import PreservedScalarString
-from dotenv import dotenv_values
-import ruamel.yaml as yaml
-import os, sys, argparse, re
-import toml
-import openai
+import os, sys, argparse, re, time, random, asyncio, hashlib
+
+from disk_cache import DiskCache, make_cache_key
+import instrumentation
+
+MAX_TOKENS = 2000
+TEMPERATURE = 0.1
+CHARS_PER_TOKEN = 4
+DESCRIPTION_CACHE_DIR = ".description_cache"
+DESCRIPTION_CACHE_MAX_MB = 256
+openai_settings = None
+
+
+class DescriptionError(Exception):
+    """Raised when a generated description fails validation."""
+
+
+def get_transient_errors():
+    """OpenAI errors that are worth retrying."""
+    import openai
+    return (
+        openai.error.RateLimitError,
+        openai.error.APIError,
+        openai.error.APIConnectionError,
+        openai.error.ServiceUnavailableError,
+        openai.error.Timeout,
+        openai.error.TryAgain,
+    )
 
 def validate_description_generation(description_toml):
     """
     Take an AI generated description of a skill adhering to the TOML format and ensures it is valid.
     """
+    import toml
     required_parameters = [
         "skill_name",
         "skill_description",
@@ -69,6 +103,8 @@ def validate_description_generation(description_toml):
         return False, "TOMLDecodeError"
 
 def simplified_yaml(yaml_file):
+    import ruamel.yaml as yaml
+    from ruamel.yaml.scalarstring import PreservedScalarString
     if isinstance(yaml_file, dict):
         for key, value in yaml_file.items():
             if isinstance(value, dict):
@@ -138,10 +174,17 @@ def get_injected_template(directory, describe_template_location):
     return full_prompt
 
 def load_openai():
-    """Load the OpenAI API key."""
-    env_vars = dotenv_values(".env")
-    openai.api_key = env_vars["OPENAI_API_KEY"]
-    return env_vars
+    """Load the OpenAI API key from .env. The file is only read the first time."""
+    global openai_settings
+    if openai_settings is None:
+        import openai
+        from dotenv import dotenv_values
+        env_vars = dotenv_values(".env")
+        openai.api_key = env_vars["OPENAI_API_KEY"]
+        if env_vars.get("OPENAI_API_BASE"):
+            openai.api_base = env_vars["OPENAI_API_BASE"]
+        openai_settings = env_vars
+    return openai_settings
 
 def clean_description(description):
     """ Clean the description of extra newlines and spaces. """
@@ -151,6 +194,7 @@ def clean_description(description):
 
 def save_description(directory, description):
     """Save the description to a TOML file."""
+    import toml
     description = clean_description(description)
     skill_name = get_skill_name_from_directory(directory)
     skill_description = toml.loads(description)
@@ -160,25 +204,178 @@ def save_description(directory, description):
     with open(file_location, 'w') as f:
         f.write(description)
 
-def main(directory, describe_template):
+def get_completion_cache_key(prompt, model, temperature=TEMPERATURE, max_tokens=MAX_TOKENS):
+    """Cache key for a completion request."""
+    prompt_hash = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+    return make_cache_key(prompt_hash, model, temperature, max_tokens)
+
+def get_cached_completion(cache, key):
+    """Get a cached completion that passed validation, or None. Completions that failed it are requested again."""
+    if cache is None:
+        return None
+    entry = cache.get(key)
+    if entry is None or not entry.get("valid"):
+        return None
+    return entry["completion"]
+
+def cache_completion(cache, key, completion, validation_results):
+    """Store a raw completion together with whether it passed validation."""
+    if cache is None:
+        return
+    cache.set(key, {
+        "completion": completion,
+        "valid": validation_results[0],
+        "reason": validation_results[1],
+    })
+
+def main(directory, describe_template, cache=None):
     """Generate a description for the skill."""
+    import openai
     openai_settings = load_openai()
     prompt = get_injected_template(directory, describe_template)
-    response = openai.Completion.create(
-            model=openai_settings["OPENAI_MODEL"],
-            prompt=prompt,
-            max_tokens=2000,
-            temperature=0.1 )
-    
-    description = response.choices[0].text
-    validation_results = validate_description_generation(description)
+    cache_key = get_completion_cache_key(prompt, openai_settings["OPENAI_MODEL"])
+    description = get_cached_completion(cache, cache_key)
+    if description is None:
+        with instrumentation.phase('model_call'):
+            response = openai.Completion.create(
+                    model=openai_settings["OPENAI_MODEL"],
+                    prompt=prompt,
+                    max_tokens=MAX_TOKENS,
+                    temperature=TEMPERATURE )
+        description = response.choices[0].text
+        with instrumentation.phase('validate'):
+            validation_results = validate_description_generation(description)
+        cache_completion(cache, cache_key, description, validation_results)
+    else:
+        print("Using cached completion.")
+        instrumentation.count('description_cache_hits')
+        with instrumentation.phase('validate'):
+            validation_results = validate_description_generation(description)
     if validation_results[0]:
-        save_description(directory, description)
+        with instrumentation.phase('write'):
+            save_description(directory, description)
     else:
-        print("Description generation failed validation.", validation_results[1])
-        sys.exit(1)
+        raise DescriptionError(f"Description generation failed validation. {validation_results[1]}")
+
+class TokenRateLimiter:
+    """
+    Token bucket that paces requests to a tokens-per-minute budget.
+    Each request reserves its estimated prompt plus completion tokens before it is sent.
+    """
+    def __init__(self, tokens_per_minute):
+        self.capacity = float(tokens_per_minute)
+        self.tokens = self.capacity
+        self.rate = self.capacity / 60.0
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self, tokens):
+        """Wait until the budget allows tokens to be spent."""
+        tokens = min(float(tokens), self.capacity)
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
+
+def estimate_request_tokens(prompt, max_tokens=MAX_TOKENS):
+    """Rough token estimate for a request, used for rate limiting only."""
+    return len(prompt) // CHARS_PER_TOKEN + max_tokens
+
+def find_undescribed_skills(directory):
+    """Find every skill folder with a skprompt.txt and no description.toml, the same way deep_search does."""
+    directory = os.path.normpath(directory)
+    skills = []
+    for root, dirs, files in os.walk(directory):
+        if root == directory:
+            continue
+        if "description.toml" in files:
+            dirs[:] = []
+            continue
+        if "skprompt.txt" in files:
+            skills.append(root)
+            dirs[:] = []
+    return sorted(skills)
+
+async def create_completion_async(prompt, model, max_retries=5, base_delay=1.0):
+    """Request a completion, retrying transient errors with exponential backoff and jitter."""
+    import openai
+    transient_errors = get_transient_errors()
+    for attempt in range(max_retries + 1):
+        try:
+            with instrumentation.phase('model_call'):
+                response = await openai.Completion.acreate(
+                    model=model,
+                    prompt=prompt,
+                    max_tokens=MAX_TOKENS,
+                    temperature=TEMPERATURE)
+            return response.choices[0].text
+        except transient_errors as e:
+            if attempt == max_retries:
+                raise
+            instrumentation.count('model_retries')
+            delay = base_delay * (2 ** attempt) * (1 + random.random())
+            print(f"Transient error ({type(e).__name__}), retrying in {delay:.1f}s.")
+            await asyncio.sleep(delay)
+
+async def describe_skill_async(directory, describe_template, model, semaphore, limiter, max_retries=5, cache=None):
+    """
+    Describe one skill. Returns (directory, ok, reason) instead of exiting, so one failure does not stop a batch.
+    """
+    skill_name = get_skill_name_from_directory(directory)
+    try:
+        prompt = get_injected_template(directory, describe_template)
+        cache_key = get_completion_cache_key(prompt, model)
+        description = get_cached_completion(cache, cache_key)
+        if description is None:
+            async with semaphore:
+                if limiter is not None:
+                    await limiter.acquire(estimate_request_tokens(prompt))
+                print("Describing", directory)
+                description = await create_completion_async(prompt, model, max_retries)
+            with instrumentation.phase('validate'):
+                validation_results = validate_description_generation(description)
+            cache_completion(cache, cache_key, description, validation_results)
+        else:
+            print("Using cached completion for", directory)
+            instrumentation.count('description_cache_hits')
+            with instrumentation.phase('validate'):
+                validation_results = validate_description_generation(description)
+        if not validation_results[0]:
+            print(f"Description generation for {skill_name} failed validation.", validation_results[1])
+            return directory, False, validation_results[1]
+        with instrumentation.phase('write'):
+            save_description(directory, description)
+        return directory, True, None
+    except Exception as e:
+        print(f"Failed to describe {skill_name}.", e)
+        return directory, False, str(e)
+
+async def describe_skills_async(directories, describe_template, concurrency=8, tokens_per_minute=None, max_retries=5, cache=None):
+    """Describe many skills concurrently. Returns a list of (directory, ok, reason)."""
+    openai_settings = load_openai()
+    semaphore = asyncio.Semaphore(concurrency)
+    limiter = TokenRateLimiter(tokens_per_minute) if tokens_per_minute else None
+    tasks = [describe_skill_async(directory, describe_template, openai_settings["OPENAI_MODEL"], semaphore, limiter, max_retries, cache)
+             for directory in directories]
+    return await asyncio.gather(*tasks)
+
+def concurrent_search(directory, describe_template_location, concurrency=8, tokens_per_minute=None, max_retries=5, cache=None):
+    """Describe every undescribed skill under the directory concurrently."""
+    directories = find_undescribed_skills(directory)
+    print(f"Found {len(directories)} skills to describe.")
+    results = asyncio.run(describe_skills_async(directories, describe_template_location, concurrency, tokens_per_minute, max_retries, cache))
+    failed = [result for result in results if not result[1]]
+    print(f"Described {len(results) - len(failed)} skills, {len(failed)} failed.")
+    for directory, _, reason in failed:
+        print(f"  {get_skill_name_from_directory(directory)}: {reason}")
+    return results
 
-def deep_search(directory, describe_template_location):
+def deep_search(directory, describe_template_location, cache=None):
     """Automatically search for skills in the repo and describe them."""
     directory = os.path.normpath(directory)
     for root, dirs, files in os.walk(directory):
@@ -195,12 +392,12 @@ def deep_search(directory, describe_template_location):
             if not os.path.isfile(os.path.join(child_path, "skprompt.txt")):
                 skill_name = get_skill_name_from_directory(child_path)
                 print(f"Directory {skill_name} is possibly a parent directory. Searching for children.")
-                deep_search(child_path, describe_template_location)
+                deep_search(child_path, describe_template_location, cache)
                 print(f"Done searching {skill_name} for skills to describe.")
                 continue
             try:
                 print("Describing", child_path)
-                main(child_path, describe_template_location)
+                main(child_path, describe_template_location, cache)
             except Exception as e:
                 skill_name = get_skill_name_from_directory(child_path)
                 print(f"Failed to describe {skill_name}.", e, "\nContinuing.......")
@@ -211,12 +408,21 @@ if __name__ == '__main__':
     parser.add_argument('describe_template_location', type=str, help='The location of the describe template.')
     parser.add_argument('--debug', type=bool, help='Debug mode to make sure validator is working', default=False)
     parser.add_argument('--auto_search', type=bool, help='Tags the skill template location as a parent with many children. Describes each child.', default=False)
+    parser.add_argument('--concurrency', type=int, help='With --auto_search, describe this many skills at once using asyncio.', default=None)
+    parser.add_argument('--tokens_per_minute', type=int, help='Token budget per minute for concurrent requests.', default=None)
+    parser.add_argument('--max_retries', type=int, help='Retries for transient API errors in concurrent mode.', default=5)
+    parser.add_argument('--cache_dir', type=str, help='Directory for cached completions.', default=DESCRIPTION_CACHE_DIR)
+    parser.add_argument('--cache_max_mb', type=int, help='Size limit of the completion cache in megabytes.', default=DESCRIPTION_CACHE_MAX_MB)
+    parser.add_argument('--no_cache', action='store_true', help='Always call the model and do not store completions.')
+    instrumentation.add_arguments(parser)
     args = parser.parse_args()
+    instrumentation.setup(args)
 
     directory = args.skill_template_location
     describe_template_location = args.describe_template_location
     debug = args.debug
     auto_search = args.auto_search
+    cache = None if args.no_cache or debug else DiskCache(args.cache_dir, args.cache_max_mb * 1024 * 1024)
 
     if debug:
         # Example usage
@@ -242,7 +448,13 @@ if __name__ == '__main__':
             print("All required parameters exist in the TOML string.")
         else:
             print("One or more required parameters are missing in the TOML string.", results[1])
+    elif auto_search and args.concurrency:
+        concurrent_search(directory, describe_template_location, args.concurrency, args.tokens_per_minute, args.max_retries, cache)
     elif auto_search:
-        deep_search(directory, describe_template_location)
+        deep_search(directory, describe_template_location, cache)
     else:
-        main(directory, describe_template_location)
+        try:
+            main(directory, describe_template_location, cache)
+        except DescriptionError as e:
+            print(e)
+            sys.exit(1)
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+"""
+Script to generate a synthetic Skills tree of any size for benchmarking.
+Skills can be written in the legacy three-file format (config.json, description.toml, skprompt.txt),
+the .skill format, or both. Prompt lengths and variable counts are drawn around realistic values.
+"""
+import os
+import json
+import random
+import argparse
+
+import instrumentation
+
+WORDS = (
+    "the assistant user input text summary email question answer context history note topic list item "
+    "write generate explain describe classify extract translate rewrite story poem code python script "
+    "result output format example instructions rules response detail short long important should must "
+    "always never only each every first then next finally please given following provided based about"
+).split()
+VARIABLE_NAMES = ("input", "history", "context", "user", "bot", "language", "tone", "topic", "date", "name", "style", "format")
+SKILLS_PER_CATEGORY = 50
+PROMPT_WORDS = 120
+VARIABLES_PER_SKILL = 3
+
+
+def make_prompt(rng, prompt_words=PROMPT_WORDS, variable_count=VARIABLES_PER_SKILL):
+    """Generate a prompt of roughly prompt_words words, with variable_count {{$var}} referenced at least once each."""
+    length = max(1, int(rng.gauss(prompt_words, prompt_words / 3)))
+    variables = rng.sample(VARIABLE_NAMES, min(variable_count, len(VARIABLE_NAMES)))
+    words = [rng.choice(WORDS) for _ in range(length)]
+    for variable in variables:
+        for _ in range(rng.randint(1, 3)):
+            words.insert(rng.randrange(len(words) + 1), f"{{{{${variable}}}}}")
+    lines = []
+    position = 0
+    while position < len(words):
+        step = rng.randint(6, 16)
+        lines.append(' '.join(words[position:position + step]))
+        position += step
+        if rng.random() < 0.15:
+            lines.append('')
+    return '\n'.join(lines) + '\n', variables
+
+def make_settings(rng):
+    """Generate completion settings like the ones found in the Skills tree."""
+    return {
+        "max_tokens": rng.choice((64, 256, 1000, 2000)),
+        "temperature": rng.choice((0.0, 0.5, 0.7, 0.9)),
+        "top_p": rng.choice((0.0, 1.0)),
+        "presence_penalty": 0.0,
+        "frequency_penalty": 0.0,
+        "stop_sequences": rng.choice(([], ["[done]"], ["Human:", "AI:"])),
+    }
+
+def write_legacy_skill(directory, name, description, prompt, variables, settings):
+    """Write a skill in the three-file format."""
+    os.makedirs(directory, exist_ok=True)
+    config = {
+        "schema": 1,
+        "type": "completion",
+        "description": description,
+        "default_backends": ["text-davinci-003"],
+        "completion": settings,
+    }
+    with open(os.path.join(directory, 'config.json'), 'w', encoding='utf-8') as f:
+        json.dump(config, f, indent=2)
+    lines = ["[description]", f'skill_name = "{name}"', f'skill_description = "{description}"']
+    for variable in variables:
+        lines += ["", "[[description.arguments]]", f'argument_name = "{variable}"',
+                  f'argument_identifier = "{{{{${variable}}}}}"', f'argument_description = "The {variable} to use."']
+    with open(os.path.join(directory, 'description.toml'), 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+    with open(os.path.join(directory, 'skprompt.txt'), 'w', encoding='utf-8') as f:
+        f.write(prompt)
+
+def write_skill_file(path, name, description, prompt, variables, settings):
+    """Write a skill in the .skill format."""
+    content = f"name: {name}\n"
+    content += f"description: \"{description}\"\n"
+    content += "skill_class: semantic\n"
+    content += "skill: |\n"
+    for line in prompt.splitlines():
+        content += f"  {line}\n" if line else "\n"
+    content += "inputs:\n"
+    for variable in variables:
+        content += f"  - name: {variable}\n"
+        content += "    type: text\n"
+        content += f"    description: \"The {variable} to use.\"\n"
+        content += "    default: \"\"\n"
+        content += "    required: True\n"
+    content += "settings:\n"
+    content += "    model: \"text-davinci-003\"\n"
+    for key in ("max_tokens", "temperature", "top_p", "presence_penalty", "frequency_penalty"):
+        content += f"    {key}: {settings[key]}\n"
+    if settings["stop_sequences"]:
+        content += "    stop:\n"
+        for stop in settings["stop_sequences"]:
+            content += f"      - \"{stop}\"\n"
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+def generate_skill_tree(output_dir, count, skill_format='skill', seed=0, prompt_words=PROMPT_WORDS,
+                        variables_per_skill=VARIABLES_PER_SKILL, skills_per_category=SKILLS_PER_CATEGORY):
+    """
+    Generate count skills under output_dir, grouped into categories of skills_per_category.
+    skill_format is "skill", "legacy" or "both". Returns the number of skills written.
+    """
+    rng = random.Random(seed)
+    for number in range(count):
+        category = f"Category{number // skills_per_category:04d}Skill"
+        name = f"skill{number:06d}"
+        description = f"Synthetic skill {number} that can {rng.choice(WORDS)} the {rng.choice(WORDS)}."
+        prompt, variables = make_prompt(rng, prompt_words, max(1, int(rng.gauss(variables_per_skill, 1))))
+        settings = make_settings(rng)
+        category_dir = os.path.join(output_dir, category)
+        if skill_format in ('legacy', 'both'):
+            write_legacy_skill(os.path.join(category_dir, name.capitalize()), name, description, prompt, variables, settings)
+        if skill_format in ('skill', 'both'):
+            os.makedirs(category_dir, exist_ok=True)
+            write_skill_file(os.path.join(category_dir, f"{name}.skill"), name, description, prompt, variables, settings)
+    return count
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic Skills tree for benchmarking.")
+    parser.add_argument("-o", "--output", required=True, help="Directory to write the skills to.")
+    parser.add_argument("-n", "--count", type=int, default=100, help="Number of skills to generate.")
+    parser.add_argument("--format", choices=("skill", "legacy", "both"), default="skill", help="Format of the generated skills.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+    parser.add_argument("--prompt_words", type=int, default=PROMPT_WORDS, help="Average number of words per prompt.")
+    parser.add_argument("--variables", type=int, default=VARIABLES_PER_SKILL, help="Average number of variables per prompt.")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    instrumentation.setup(args)
+
+    count = generate_skill_tree(os.path.abspath(args.output), args.count, args.format, args.seed, args.prompt_words, args.variables)
+    print(f"Generated {count} skills in {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+"""
+Shared timing and profiling hooks for the scripts.
+METRICS collects counters and latency histograms for named phases (walk, read, parse, render, tokenize,
+model_call, validate, write, ...). Code marks a phase with `with phase("read"):` or counts events with
+count("cache_hits"). Work done inside worker processes is timed as a whole by the parent.
+
+Every CLI accepts:
+    --metrics PATH   write the collected metrics on exit, as Prometheus text if PATH ends in .prom, else JSON
+    --profile PATH   run the main thread under cProfile, save the stats to PATH and print the top functions
+"""
+import sys
+import json
+import time
+import atexit
+import bisect
+import argparse
+import threading
+from contextlib import contextmanager
+
+# Upper bounds of the latency histogram buckets, in seconds.
+LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0)
+METRIC_PREFIX = "skills"
+PROFILE_TOP_FUNCTIONS = 25
+
+
+class Histogram:
+    """Count, sum, min, max and bucketed distribution of observed durations."""
+    __slots__ = ('count', 'total', 'minimum', 'maximum', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.minimum = None
+        self.maximum = None
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.minimum = seconds if self.minimum is None else min(self.minimum, seconds)
+        self.maximum = seconds if self.maximum is None else max(self.maximum, seconds)
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'total': self.total,
+            'mean': self.total / self.count if self.count else 0.0,
+            'min': self.minimum,
+            'max': self.maximum,
+            'buckets': {str(bound): count for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), self.buckets)},
+        }
+
+
+class Metrics:
+    """Thread-safe registry of counters and phase histograms."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.phases = {}
+        self.started = time.time()
+
+    def count(self, name, value=1):
+        """Add value to a counter."""
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name, seconds):
+        """Record one duration of a phase."""
+        with self.lock:
+            histogram = self.phases.get(name)
+            if histogram is None:
+                histogram = self.phases[name] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def phase(self, name):
+        """Time the enclosed block as one observation of a phase."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def reset(self):
+        with self.lock:
+            self.counters.clear()
+            self.phases.clear()
+            self.started = time.time()
+
+    def to_dict(self):
+        with self.lock:
+            return {
+                'started': self.started,
+                'elapsed': time.time() - self.started,
+                'counters': dict(self.counters),
+                'phases': {name: histogram.to_dict() for name, histogram in sorted(self.phases.items())},
+            }
+
+    def to_prometheus(self, prefix=METRIC_PREFIX):
+        """Render the metrics in the Prometheus text exposition format."""
+        lines = []
+        with self.lock:
+            for name, value in sorted(self.counters.items()):
+                metric = f"{prefix}_{name}_total"
+                lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+            if self.phases:
+                metric = f"{prefix}_phase_seconds"
+                lines.append(f"# TYPE {metric} histogram")
+                for name, histogram in sorted(self.phases.items()):
+                    cumulative = 0
+                    for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), histogram.buckets):
+                        cumulative += count
+                        lines.append(f'{metric}_bucket{{phase="{name}",le="{bound}"}} {cumulative}')
+                    lines.append(f'{metric}_sum{{phase="{name}"}} {histogram.total}')
+                    lines.append(f'{metric}_count{{phase="{name}"}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def save(self, path):
+        """Write the metrics to path, as Prometheus text for .prom files and JSON otherwise."""
+        content = self.to_prometheus() if path.endswith('.prom') else json.dumps(self.to_dict(), indent=2) + '\n'
+        if path == '-':
+            sys.stderr.write(content)
+            return
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+
+    def summary(self):
+        """One line per phase with its count and total time, slowest first."""
+        with self.lock:
+            phases = sorted(self.phases.items(), key=lambda item: -item[1].total)
+            return [f"{name:<16} {histogram.count:>8} x {histogram.total:9.3f}s" for name, histogram in phases]
+
+
+METRICS = Metrics()
+phase = METRICS.phase
+count = METRICS.count
+
+
+def add_arguments(parser):
+    """Add the --metrics and --profile options to a CLI."""
+    group = parser.add_argument_group("instrumentation")
+    group.add_argument("--metrics", default=None, help="Write phase timings and counters on exit (.prom for Prometheus text, otherwise JSON, - for stderr).")
+    group.add_argument("--profile", default=None, help="Profile the run with cProfile and save the stats to this file.")
+    return parser
+
+def setup(args):
+    """Start profiling if requested and arrange for metrics and profile stats to be written when the process exits."""
+    profiler = None
+    if getattr(args, 'profile', None):
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    metrics_path = getattr(args, 'metrics', None)
+    if profiler is None and not metrics_path:
+        return
+
+    def finish():
+        if profiler is not None:
+            profiler.disable()
+            import pstats
+            profiler.dump_stats(args.profile)
+            print(f"\nProfile saved to {args.profile}. Top functions by cumulative time:", file=sys.stderr)
+            pstats.Stats(profiler, stream=sys.stderr).sort_stats('cumulative').print_stats(PROFILE_TOP_FUNCTIONS)
+        if metrics_path:
+            METRICS.save(metrics_path)
+            for line in METRICS.summary():
+                print(line, file=sys.stderr)
+
+    atexit.register(finish)
+
+def main():
+    parser = argparse.ArgumentParser(description="Print the phase summary of a saved JSON metrics file.")
+    parser.add_argument("metrics_file", help="JSON file written with --metrics.")
+    args = parser.parse_args()
+
+    with open(args.metrics_file, 'r', encoding='utf-8') as f:
+        metrics = json.load(f)
+    for name, value in sorted(metrics['counters'].items()):
+        print(f"{name:<24} {value}")
+    for name, histogram in sorted(metrics['phases'].items(), key=lambda item: -item[1]['total']):
+        print(f"{name:<24} {histogram['count']:>8} x {histogram['total']:9.3f}s  (mean {histogram['mean'] * 1000:.2f}ms, max {histogram['max'] * 1000:.2f}ms)")
+
+if __name__ == "__main__":
+    main()
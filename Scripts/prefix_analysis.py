@@ -0,0 +1,283 @@
+#!/usr/bin/env python
+"""
+Shared-prefix analysis of the skill prompts, for provider-side and local KV prefix caches.
+A prefix cache only helps when requests start with the same tokens, so what matters is the static text before a
+skill's first {{$var}}. That text is tokenized up to its last safe cut (see prompt_cost.py), which for cl100k, the
+encoding token_counter.py loads, gives exactly the tokens every rendered request starts with, and inserted into a
+token-level radix trie over all skills. For encodings without that guarantee no prefix is counted as cacheable.
+
+The report lists the prefixes shared by several skills and, for each skill, its first variable, the token position
+it appears at and how many of its static tokens come after it. A variable such as {{$user}} near the top of a long
+prompt keeps the rest of the prompt out of the cache.
+
+With --requests, a JSONL file of requests is rendered and written back ordered so that requests sharing a prefix
+are adjacent, which is the order in which prefix caches hit most often.
+"""
+import os
+import sys
+import json
+import argparse
+
+from skill_registry import load_registry
+from skill_template import SkillRenderer
+from prompt_cost import SAFE_CUT_ENCODINGS, find_safe_cuts
+import token_counter
+import instrumentation
+from instrumentation import phase
+
+MIN_SHARED_TOKENS = 16
+TOP_GROUPS = 20
+SNIPPET_CHARS = 60
+
+
+class TrieNode:
+    """A node of the radix trie. edge holds the tokens from the parent, count the skills passing through."""
+    __slots__ = ('edge', 'children', 'keys', 'count', 'depth')
+
+    def __init__(self, edge=(), depth=0):
+        self.edge = edge
+        self.children = {}
+        self.keys = []
+        self.count = 0
+        self.depth = depth
+
+
+class PrefixTrie:
+    """Token-level radix trie over the cacheable prefixes of the skills."""
+
+    def __init__(self):
+        self.root = TrieNode()
+
+    def insert(self, tokens, key):
+        """Add the prefix of a skill."""
+        tokens = tuple(tokens)
+        node = self.root
+        node.count += 1
+        position = 0
+        while position < len(tokens):
+            child = node.children.get(tokens[position])
+            if child is None:
+                child = TrieNode(tokens[position:], node.depth + len(tokens) - position)
+                node.children[tokens[position]] = child
+                node = child
+                node.count += 1
+                break
+            edge = child.edge
+            length = 0
+            limit = min(len(edge), len(tokens) - position)
+            while length < limit and edge[length] == tokens[position + length]:
+                length += 1
+            if length < len(edge):
+                # Split the edge where the new prefix leaves it.
+                middle = TrieNode(edge[:length], node.depth + length)
+                middle.count = child.count
+                child.edge = edge[length:]
+                middle.children[child.edge[0]] = child
+                node.children[tokens[position]] = middle
+                child = middle
+            node = child
+            node.count += 1
+            position += length
+        node.keys.append(key)
+
+    def iter_nodes(self, node=None, path=()):
+        """Yield (node, tokens) for every node below node, depth first, where tokens is the prefix it stands for."""
+        stack = [(node or self.root, path)]
+        while stack:
+            node, path = stack.pop()
+            yield node, path
+            for child in node.children.values():
+                stack.append((child, path + child.edge))
+
+    def get_keys(self, node):
+        """Keys of every skill whose prefix passes through node."""
+        return [key for child, _ in self.iter_nodes(node) for key in child.keys]
+
+    def get_shared_nodes(self):
+        """Map each skill key to the deepest node on its path that another skill also passes through, or None."""
+        shared = {}
+        stack = [(self.root, None)]
+        while stack:
+            node, deepest = stack.pop()
+            if node.count >= 2 and node is not self.root:
+                deepest = node
+            for key in node.keys:
+                shared[key] = deepest
+            for child in node.children.values():
+                stack.append((child, deepest))
+        return shared
+
+    def get_groups(self, min_tokens=MIN_SHARED_TOKENS):
+        """Nodes whose prefix of at least min_tokens tokens is shared by two or more skills, longest and widest first."""
+        groups = [(node, path) for node, path in self.iter_nodes()
+                  if node.count >= 2 and node.depth >= min_tokens]
+        groups.sort(key=lambda item: (-item[0].depth * item[0].count, -item[0].depth))
+        return groups
+
+
+def get_cacheable_prefix(static, encoding):
+    """
+    The part of a static text whose tokens do not depend on what follows it: everything up to its last safe cut.
+    Empty for encodings outside SAFE_CUT_ENCODINGS, where a safe cut does not fix the tokens before it.
+    """
+    if encoding.name not in SAFE_CUT_ENCODINGS:
+        return ''
+    cuts = find_safe_cuts(static)
+    return static[:cuts[-1]] if cuts else ''
+
+def analyze_skill(template, encoding):
+    """
+    Token positions of a compiled skill. Returns a dict with the cacheable prefix tokens, the first variable and
+    its token position, and the total static tokens of the prompt.
+    """
+    statics = template.statics
+    static_counts = [len(tokens) for tokens in encoding.encode_ordinary_batch(statics, num_threads=1)]
+    if not template.variables:
+        prefix = encoding.encode_ordinary(statics[0])
+        first_variable = None
+    else:
+        prefix = encoding.encode_ordinary(get_cacheable_prefix(statics[0], encoding))
+        first_variable = template.variables[0]
+    return {
+        'prefix': prefix,
+        'first_variable': first_variable,
+        'first_variable_token': static_counts[0] if first_variable is not None else None,
+        'static_tokens': sum(static_counts),
+    }
+
+def analyze_registry(registry, encoding=None, renderer=None):
+    """Build the prefix trie over every skill. Returns (trie, per-skill analysis dict)."""
+    encoding = encoding or token_counter.get_token_encodings()
+    renderer = renderer or SkillRenderer(registry)
+    trie = PrefixTrie()
+    skills = {}
+    with phase('tokenize'):
+        for entry in registry:
+            skills[entry.key] = analyze_skill(renderer.get_template(entry.key), encoding)
+    with phase('trie'):
+        for key, skill in skills.items():
+            trie.insert(skill['prefix'], key)
+        for key, node in trie.get_shared_nodes().items():
+            skills[key]['shared_tokens'] = node.depth if node else 0
+            skills[key]['shared_by'] = node.count if node else 1
+    return trie, skills
+
+def get_snippet(encoding, tokens, chars=SNIPPET_CHARS):
+    """Start and end of the text of a prefix, on one line."""
+    text = encoding.decode(list(tokens))
+    text = text if len(text) <= chars * 2 else f"{text[:chars]} ... {text[-chars:]}"
+    return json.dumps(text)
+
+def get_shared_prefix_tokens(encoding, previous, prompt):
+    """Tokens two rendered prompts share at the start, counted up to the last safe cut of their common prefix."""
+    if previous == prompt:
+        return len(encoding.encode_ordinary(prompt))
+    common = os.path.commonprefix([previous, prompt])
+    return len(encoding.encode_ordinary(get_cacheable_prefix(common, encoding)))
+
+def get_adjacent_shared_tokens(encoding, prompts):
+    """Sum of the prefix tokens each prompt shares with the one before it, a lower bound on prefix cache hits."""
+    return sum(get_shared_prefix_tokens(encoding, previous, prompt) for previous, prompt in zip(prompts, prompts[1:]))
+
+def order_requests(trie, renderer, requests):
+    """
+    Render requests (dicts with "skill" and "inputs") and order them by shared prefix.
+    Skills are taken in depth-first order of the trie, so skills sharing a prefix are adjacent, and the requests
+    of each skill are sorted by rendered prompt, which also brings together requests whose values start the same way.
+    Returns a list of (group, index, request, prompt) in the new order, where group numbers the deepest prefix
+    the skill shares with another skill, or is None if it shares none.
+    """
+    node_positions = {}
+    key_positions = {}
+    for position, (node, _) in enumerate(trie.iter_nodes()):
+        node_positions[id(node)] = position
+        for key in node.keys:
+            key_positions[key] = position
+    shared = trie.get_shared_nodes()
+    ordered = []
+    with phase('render'):
+        for index, request in enumerate(requests):
+            key = request['skill']
+            node = shared.get(key)
+            group = node_positions[id(node)] if node is not None else None
+            ordered.append((key_positions[key], key, renderer.render(key, request.get('inputs') or {}), index, group, request))
+    ordered.sort(key=lambda item: item[:4])
+    return [(group, index, request, prompt) for _, _, prompt, index, group, request in ordered]
+
+def print_report(trie, skills, encoding, min_tokens=MIN_SHARED_TOKENS, top=TOP_GROUPS):
+    prefix_tokens = sum(len(skill['prefix']) for skill in skills.values())
+    unique_tokens = sum(len(node.edge) for node, _ in trie.iter_nodes())
+    shared_tokens = sum(skill['shared_tokens'] for skill in skills.values())
+    print(f"{len(skills)} skills, {prefix_tokens} cacheable prefix tokens, {unique_tokens} unique in the trie, "
+          f"{shared_tokens} shared with another skill.")
+
+    groups = trie.get_groups(min_tokens)
+    print(f"\nShared prefixes of at least {min_tokens} tokens ({len(groups)}):")
+    for node, path in groups[:top]:
+        keys = trie.get_keys(node)
+        listed = ', '.join(sorted(keys)[:5]) + (f" and {len(keys) - 5} more" if len(keys) > 5 else '')
+        print(f"  {node.depth:>6} tokens x {node.count:<4} {listed}")
+        print(f"         {get_snippet(encoding, path)}")
+
+    print("\nFirst variable per skill (token position / static tokens, shared prefix tokens):")
+    # Skills whose first variable leaves the most static text out of the cache come first.
+    def get_static_after(skill):
+        first = skill['first_variable_token']
+        return skill['static_tokens'] - (first if first is not None else skill['static_tokens'])
+    order = sorted(skills.items(), key=lambda item: -get_static_after(item[1]))
+    for key, skill in order:
+        if skill['first_variable'] is None:
+            print(f"  {key:<40} no variables, {skill['static_tokens']} tokens, {skill['shared_tokens']} shared")
+            continue
+        after = skill['static_tokens'] - skill['first_variable_token']
+        print(f"  {key:<40} {{{{${skill['first_variable']}}}}} at {skill['first_variable_token']} / {skill['static_tokens']} "
+              f"({after} static tokens after it), {skill['shared_tokens']} shared")
+
+def main():
+    parser = argparse.ArgumentParser(description="Find prompt prefixes shared between skills and order requests for prefix caching.")
+    parser.add_argument("--skills", required=True, help="Path to directory containing .skill files.")
+    parser.add_argument("--min_tokens", type=int, default=MIN_SHARED_TOKENS, help="Shortest shared prefix to report.")
+    parser.add_argument("--top", type=int, default=TOP_GROUPS, help="Number of shared prefixes to list.")
+    parser.add_argument("--json", action="store_true", help="Print the per-skill analysis as JSON.")
+    parser.add_argument("--requests", help="JSONL file of requests ({\"skill\": key, \"inputs\": {...}}) to render in prefix order.")
+    parser.add_argument("-o", "--output", help="With --requests, file to write the ordered requests to. Defaults to standard output.")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    instrumentation.setup(args)
+
+    registry = load_registry(args.skills)
+    renderer = SkillRenderer(registry)
+    encoding = token_counter.get_token_encodings()
+    trie, skills = analyze_registry(registry, encoding, renderer)
+
+    if args.requests:
+        with open(args.requests, 'r', encoding='utf-8') as f:
+            requests = [json.loads(line) for line in f if line.strip()]
+        missing = set(request.get('skill') for request in requests) - set(registry.keys())
+        if missing:
+            print(f"Unknown skills: {', '.join(sorted(map(str, missing)))}")
+            sys.exit(1)
+        ordered = order_requests(trie, renderer, requests)
+        out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+        try:
+            for group, index, request, prompt in ordered:
+                out.write(json.dumps({'index': index, 'group': group, **request, 'prompt': prompt}) + '\n')
+        finally:
+            if args.output:
+                out.close()
+        original = [prompt for _, _, _, prompt in sorted(ordered, key=lambda item: item[1])]
+        before = get_adjacent_shared_tokens(encoding, original)
+        after = get_adjacent_shared_tokens(encoding, [prompt for _, _, _, prompt in ordered])
+        print(f"{len(ordered)} requests, prefix tokens shared with the previous request: {before} in input order, {after} ordered.",
+              file=sys.stderr)
+    elif args.json:
+        report = {}
+        for key, skill in skills.items():
+            report[key] = {'prefix_tokens': len(skill['prefix'])}
+            report[key].update((name, value) for name, value in skill.items() if name != 'prefix')
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(trie, skills, encoding, args.min_tokens, args.top)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+"""
+Cheap per-request token counts for rendered skills.
+
+The static text of each compiled template is tokenized once. At request time only short windows around each
+{{$var}} are tokenized: the substituted value plus the static text up to the nearest "safe cut" on either side.
+
+A safe cut is a position right after a newline where the next character is not whitespace. The pre-tokenizer
+regex of cl100k never lets a chunk run across such a position, and BPE merges never cross pre-tokenizer chunks, so
+the text on each side of a safe cut is tokenized independently and summing the static counts and the window
+counts is exact. A static segment with no safe cut is simply folded into the surrounding window.
+Other encodings are not split at all and the whole rendered prompt is tokenized, which is exact but not cheaper
+than rendering it: r50k and p50k tokenize a run of newlines before a cut differently once the text is cut there,
+and o200k is not covered by the argument above.
+
+Each skill is counted with the tokenizer of the model in its settings.
+"""
+import sys
+import json
+import argparse
+
+from skill_registry import load_registry
+from skill_template import SkillRenderer
+import token_counter
+import instrumentation
+
+DEFAULT_CONTEXT_WINDOW = 4097
+MODEL_CONTEXT_WINDOWS = {
+    "text-davinci-002": 4097,
+    "text-davinci-003": 4097,
+    "code-davinci-002": 8001,
+    "gpt-3.5-turbo": 4096,
+    "gpt-4": 8192,
+    "gpt-4-32k": 32768,
+    "gemini-pro": 32760,
+}
+DEFAULT_MAX_TOKENS = 256
+# Encodings whose pre-tokenizer keeps the text on each side of a safe cut apart.
+SAFE_CUT_ENCODINGS = ('cl100k_base',)
+
+
+def find_safe_cuts(text):
+    """Positions in text that directly follow a newline and precede a non-whitespace character."""
+    cuts = []
+    position = text.find('\n')
+    while position != -1 and position + 1 < len(text):
+        if not text[position + 1].isspace():
+            cuts.append(position + 1)
+        position = text.find('\n', position + 1)
+    return cuts
+
+def get_context_window(model):
+    """Context window of a model, falling back to DEFAULT_CONTEXT_WINDOW for unknown models."""
+    return MODEL_CONTEXT_WINDOWS.get(str(model), DEFAULT_CONTEXT_WINDOW)
+
+
+class PromptCostModel:
+    """
+    Token counter for one compiled template.
+    static_tokens is the count of the static text outside every window, and windows is a list of parts
+    (static strings and variable indexes) that are rendered and tokenized per request. For encodings outside
+    SAFE_CUT_ENCODINGS the statics are not cut, so a template with variables is a single window.
+    """
+
+    def __init__(self, template, encoding):
+        self.template = template
+        self.encoding = encoding
+        statics = template.statics
+        last = len(statics) - 1
+        self.static_tokens = 0
+        self.windows = []
+        window = []
+        split = encoding.name in SAFE_CUT_ENCODINGS
+        for index, static in enumerate(statics):
+            cuts = find_safe_cuts(static) if split else []
+            start = 0 if index == 0 else (cuts[0] if cuts else None)
+            end = len(static) if index == last else (cuts[-1] if cuts else None)
+            if start is None or end is None:
+                # No safe cut: the whole static belongs to the window around it.
+                window.append(static)
+            else:
+                window.append(static[:start])
+                self.close_window(window)
+                self.static_tokens += len(encoding.encode_ordinary(static[start:end]))
+                window = [static[end:]]
+            if index < last:
+                window.append(index)
+        self.close_window(window)
+
+    def close_window(self, window):
+        """Keep a window if it contains a variable, dropping empty static parts."""
+        if any(not isinstance(part, str) for part in window):
+            self.windows.append([part for part in window if part != ''])
+
+    def count(self, values=None):
+        """Exact token count of the template rendered with values (falling back to the input defaults)."""
+        values = values or {}
+        defaults = self.template.defaults
+        variables = self.template.variables
+        texts = []
+        for window in self.windows:
+            parts = []
+            for part in window:
+                if isinstance(part, str):
+                    parts.append(part)
+                    continue
+                name = variables[part]
+                value = values[name] if name in values else defaults.get(name, '')
+                parts.append(value if isinstance(value, str) else str(value))
+            texts.append(''.join(parts))
+        if not texts:
+            return self.static_tokens
+        return self.static_tokens + sum(len(tokens) for tokens in self.encoding.encode_ordinary_batch(texts, num_threads=1))
+
+
+class SkillCostEstimator:
+    """
+    Builds and caches a PromptCostModel for each skill and checks requests against the skill's budget.
+    Skills are counted with the tokenizer of their model unless an encoding is given for all of them.
+    """
+
+    def __init__(self, registry, encoding=None):
+        self.registry = registry
+        self.renderer = SkillRenderer(registry)
+        self.encoding = encoding
+        self.models = {}
+
+    def get_model(self, key):
+        """Get the cost model for a skill, building it on first use."""
+        model = self.models.get(key)
+        if model is None:
+            model = PromptCostModel(self.renderer.get_template(key), self.get_encoding(key))
+            self.models[key] = model
+        return model
+
+    def get_encoding(self, key):
+        """Tokenizer used for a skill: the one given to the estimator, or the one of the skill's model."""
+        if self.encoding is not None:
+            return self.encoding
+        return token_counter.get_model_encodings(self.registry.get(key).settings.get('model'))
+
+    def invalidate(self, key=None):
+        """Forget cached cost models and templates, either for one skill or all of them."""
+        if key is None:
+            self.models.clear()
+        else:
+            self.models.pop(key, None)
+        self.renderer.invalidate(key)
+
+    def count(self, key, values=None):
+        """Token count of a skill's rendered prompt."""
+        return self.get_model(key).count(values)
+
+    def estimate(self, key, values=None, context_window=None):
+        """
+        Check a request against its budget. Returns a dict with the prompt tokens, the skill's max_tokens,
+        the model context window and whether prompt plus completion fit in it.
+        """
+        settings = self.registry.get(key).settings
+        max_tokens = settings.get('max_tokens', DEFAULT_MAX_TOKENS)
+        if not isinstance(max_tokens, int):
+            max_tokens = DEFAULT_MAX_TOKENS
+        if context_window is None:
+            context_window = get_context_window(settings.get('model'))
+        prompt_tokens = self.count(key, values)
+        return {
+            'prompt_tokens': prompt_tokens,
+            'max_tokens': max_tokens,
+            'total_tokens': prompt_tokens + max_tokens,
+            'context_window': context_window,
+            'fits': prompt_tokens + max_tokens <= context_window,
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description="Estimate the token cost of a rendered skill.")
+    parser.add_argument("--skills", required=True, help="Path to directory containing .skill files.")
+    parser.add_argument("--skill", required=True, help="Dotted key of the skill (e.g. Chat.chat).")
+    parser.add_argument("--inputs", help="JSON object of input values. Defaults from the skill are used for missing inputs.")
+    parser.add_argument("--context_window", type=int, default=None, help="Override the model's context window.")
+    parser.add_argument("--verify", action="store_true", help="Also tokenize the full rendered prompt and compare.")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    instrumentation.setup(args)
+
+    registry = load_registry(args.skills)
+    if args.skill not in registry:
+        print(f"Skill {args.skill} not found.")
+        sys.exit(1)
+    estimator = SkillCostEstimator(registry)
+    values = json.loads(args.inputs) if args.inputs else {}
+    estimate = estimator.estimate(args.skill, values, args.context_window)
+    if args.verify:
+        prompt = estimator.renderer.render(args.skill, values)
+        estimate['full_prompt_tokens'] = len(estimator.get_encoding(args.skill).encode_ordinary(prompt))
+    print(json.dumps(estimate, indent=2))
+    if args.verify and estimate['full_prompt_tokens'] != estimate['prompt_tokens']:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+#!/usr/bin/env python
+"""
+Two-tier cache for skill completions.
+Results are keyed on a hash of the skill (prompt template, inputs and settings), a hash of the rendered prompt and
+the request settings. Lookups go to an in-memory LRU first and then to a size-bounded DiskCache, and disk hits are
+promoted into memory.
+
+Only deterministic requests are cached by default: a skill whose temperature is above 0 bypasses the cache unless
+the cache is created with cache_sampled=True. Entries can expire after a time to live, set per skill with the ttls
+mapping, or with cache_ttl in the skill's settings, or for all skills with default_ttl.
+"""
+import json
+import time
+import hashlib
+import argparse
+import threading
+from collections import OrderedDict
+
+from disk_cache import DiskCache, make_cache_key
+from skill_client import build_completion_request
+import instrumentation
+
+RESULT_CACHE_DIR = ".result_cache"
+RESULT_CACHE_MAX_MB = 512
+MEMORY_ITEMS = 4096
+# The API default, used for skills that do not set a temperature.
+DEFAULT_TEMPERATURE = 1.0
+
+
+def get_skill_hash(entry):
+    """Hash everything in a skill that affects its completions."""
+    return make_cache_key(entry.read_prompt(), entry.inputs, entry.settings)
+
+def get_prompt_hash(prompt):
+    return hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """In-memory LRU in front of a DiskCache, with per-skill expiry and hit/miss counters."""
+
+    def __init__(self, directory=RESULT_CACHE_DIR, max_bytes=RESULT_CACHE_MAX_MB * 1024 * 1024, memory_items=MEMORY_ITEMS,
+                 ttls=None, default_ttl=None, cache_sampled=False):
+        self.disk = DiskCache(directory, max_bytes) if directory else None
+        self.memory = OrderedDict()
+        self.memory_items = memory_items
+        self.ttls = dict(ttls or {})
+        self.default_ttl = default_ttl
+        self.cache_sampled = cache_sampled
+        self.skill_hashes = {}
+        self.in_flight = {}
+        self.lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.bypassed = 0
+
+    def is_cacheable(self, settings):
+        """Check whether completions with these settings may be cached."""
+        if self.cache_sampled:
+            return True
+        temperature = settings.get('temperature', DEFAULT_TEMPERATURE)
+        return isinstance(temperature, (int, float)) and temperature <= 0
+
+    def get_ttl(self, entry):
+        """Seconds a result of this skill stays valid, or None if it never expires."""
+        if entry.key in self.ttls:
+            return self.ttls[entry.key]
+        ttl = entry.settings.get('cache_ttl')
+        if isinstance(ttl, (int, float)) and not isinstance(ttl, bool):
+            return ttl
+        return self.default_ttl
+
+    def get_skill_hash(self, entry):
+        """Skill hash, computed once per version of the skill file."""
+        version = (entry.key, entry.mtime, entry.size)
+        skill_hash = self.skill_hashes.get(version)
+        if skill_hash is None:
+            skill_hash = get_skill_hash(entry)
+            self.skill_hashes[version] = skill_hash
+        return skill_hash
+
+    def get_key(self, entry, prompt, model=None):
+        """Cache key for a request: the skill, the rendered prompt and the settings sent with it."""
+        request = build_completion_request('', entry.settings, model)
+        return make_cache_key(self.get_skill_hash(entry), get_prompt_hash(prompt), request)
+
+    def get(self, key, ttl=None):
+        """Get a cached completion, or None if it is missing or older than ttl seconds."""
+        now = time.time()
+        with self.lock:
+            record = self.memory.get(key)
+            if record is not None:
+                if ttl is None or now - record['created'] <= ttl:
+                    self.memory.move_to_end(key)
+                    self.memory_hits += 1
+                    instrumentation.count('result_cache_memory_hits')
+                    return record['output']
+                del self.memory[key]
+        record = self.disk.get(key) if self.disk else None
+        with self.lock:
+            if record is not None and (ttl is None or now - record['created'] <= ttl):
+                self.disk_hits += 1
+                instrumentation.count('result_cache_disk_hits')
+                self.remember(key, record)
+                return record['output']
+            if record is not None:
+                self.expired += 1
+            self.misses += 1
+            instrumentation.count('result_cache_misses')
+        if record is not None and self.disk:
+            self.disk.delete(key)
+        return None
+
+    def set(self, key, output):
+        """Store a completion in both tiers."""
+        record = {'created': time.time(), 'output': output}
+        with self.lock:
+            self.remember(key, record)
+        # The disk tier has its own lock, so a slow write or eviction does not hold up memory lookups.
+        if self.disk:
+            self.disk.set(key, record)
+
+    def remember(self, key, record):
+        """Put a record in the memory tier, dropping the least recently used one if it is full. Call with the lock held."""
+        self.memory[key] = record
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_items:
+            self.memory.popitem(last=False)
+
+    def complete(self, client, entry, prompt, model=None):
+        """Complete a rendered prompt for a skill through the cache."""
+        settings = entry.settings
+        if not self.is_cacheable(settings):
+            with self.lock:
+                self.bypassed += 1
+            return client.complete(prompt, settings, model)
+        key = self.get_key(entry, prompt, model)
+        ttl = self.get_ttl(entry)
+        output = self.get(key, ttl)
+        if output is not None:
+            return output
+        # Identical requests that miss at the same time share one model call.
+        with self.lock:
+            waiting = self.in_flight.get(key)
+            if waiting is None:
+                self.in_flight[key] = threading.Event()
+        if waiting is not None:
+            waiting.wait()
+            output = self.get(key, ttl)
+            if output is not None:
+                return output
+            return client.complete(prompt, settings, model)
+        try:
+            output = client.complete(prompt, settings, model)
+            self.set(key, output)
+        finally:
+            with self.lock:
+                self.in_flight.pop(key).set()
+        return output
+
+    def clear(self):
+        with self.lock:
+            self.memory.clear()
+        if self.disk:
+            self.disk.clear()
+
+    def get_stats(self):
+        """Hit, miss and bypass counters."""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'expired': self.expired,
+            'bypassed': self.bypassed,
+            'hit_rate': (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            'memory_items': len(self.memory),
+            'disk_bytes': self.disk.size if self.disk else 0,
+        }
+
+def parse_ttls(values):
+    """Parse "Category.skill=seconds" arguments into a dict."""
+    ttls = {}
+    for value in values or []:
+        key, _, seconds = value.partition('=')
+        ttls[key] = float(seconds)
+    return ttls
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or clear the skill result cache.")
+    parser.add_argument("--cache_dir", default=RESULT_CACHE_DIR, help="Directory of the on-disk cache.")
+    parser.add_argument("--clear", action="store_true", help="Remove every cached result.")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    instrumentation.setup(args)
+
+    cache = ResultCache(args.cache_dir)
+    if args.clear:
+        cache.clear()
+        print(f"Cleared {args.cache_dir}")
+        return
+    entries = sum(1 for _ in cache.disk.iter_entries())
+    print(json.dumps({'directory': cache.disk.directory, 'entries': entries, 'bytes': cache.disk.size}, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python
+"""
+Packs a Skills tree into a single bundle file for fast cold starts.
+
+Layout:
+    header     fixed size, see HEADER_FORMAT
+    metadata   compact JSON list with one record per skill (same fields as the registry index)
+    prompts    every prompt body as UTF-8, back to back
+
+The loader memory-maps the bundle and hands out prompt bodies as zero-copy memoryview slices.
+The header stores a checksum of the bundle content and a fingerprint of the source files
+(path, mtime and size of every .skill file) so a stale or corrupt bundle can be detected.
+"""
+import os
+import sys
+import json
+import mmap
+import struct
+import hashlib
+import argparse
+
+from skill_registry import SkillEntry, SkillRegistry, iter_skill_files
+import instrumentation
+
+BUNDLE_MAGIC = b'SKBUNDLE'
+BUNDLE_VERSION = 1
+# magic, version, skill count, metadata offset, metadata length, prompts offset, prompts length,
+# source fingerprint, content checksum
+HEADER_FORMAT = '<8sII QQQQ 32s32s'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+
+class BundleError(Exception):
+    """Raised when a bundle file is not valid."""
+
+
+def get_source_fingerprint(skills_dir):
+    """Hash the relative path, mtime and size of every .skill file. Changes whenever a skill is added, removed or edited."""
+    skills_dir = os.path.abspath(skills_dir)
+    digest = hashlib.sha256()
+    for skill_path in iter_skill_files(skills_dir):
+        stat = os.stat(skill_path)
+        digest.update(f"{os.path.relpath(skill_path, skills_dir)}\0{stat.st_mtime_ns}\0{stat.st_size}\n".encode('utf-8'))
+    return digest.digest()
+
+def build_bundle(skills_dir, bundle_path):
+    """Index a Skills directory and write every skill into one bundle file. Returns the number of skills packed."""
+    skills_dir = os.path.abspath(skills_dir)
+    fingerprint = get_source_fingerprint(skills_dir)
+    registry = SkillRegistry(skills_dir).load()
+    for path, error in registry.errors.items():
+        print(f"Error indexing {path}: {error}")
+
+    records = []
+    prompts = []
+    offset = 0
+    for entry in registry:
+        prompt = entry.read_prompt().encode('utf-8')
+        record = entry.to_dict()
+        record['path'] = os.path.relpath(entry.path, skills_dir)
+        record['prompt_offset'] = offset
+        record['prompt_length'] = len(prompt)
+        del record['prompt_header']
+        records.append(record)
+        prompts.append(prompt)
+        offset += len(prompt)
+
+    metadata = json.dumps(records, separators=(',', ':')).encode('utf-8')
+    prompt_blob = b''.join(prompts)
+    checksum = hashlib.sha256(metadata + prompt_blob).digest()
+    header = struct.pack(HEADER_FORMAT, BUNDLE_MAGIC, BUNDLE_VERSION, len(records),
+                         HEADER_SIZE, len(metadata), HEADER_SIZE + len(metadata), len(prompt_blob),
+                         fingerprint, checksum)
+
+    temp_path = bundle_path + '.tmp'
+    with instrumentation.phase('write'), open(temp_path, 'wb') as f:
+        f.write(header)
+        f.write(metadata)
+        f.write(prompt_blob)
+    os.replace(temp_path, bundle_path)
+    return len(records)
+
+
+class BundleEntry(SkillEntry):
+    """Index record for a skill stored in a bundle. The prompt is read from the memory-mapped bundle."""
+    __slots__ = ('bundle',)
+
+    def __init__(self, bundle, record):
+        super().__init__(
+            name=record['name'],
+            category=record['category'],
+            path=record['path'],
+            description=record['description'],
+            skill_class=record['skill_class'],
+            inputs=record['inputs'],
+            settings=record['settings'],
+            prompt_header='|',
+            prompt_offset=record['prompt_offset'],
+            prompt_length=record['prompt_length'],
+            mtime=record['mtime'],
+            size=record['size'],
+        )
+        self.bundle = bundle
+
+    def read_prompt(self):
+        """Decode the prompt body from the bundle."""
+        return str(self.bundle.get_prompt_bytes(self.key), 'utf-8')
+
+
+class SkillBundle:
+    """
+    Read-only view of a bundle file with the same lookup methods as SkillRegistry.
+    Call close() (or use it as a context manager) to release the memory map once no prompt memoryviews are held.
+    """
+
+    def __init__(self, bundle_path, verify=False):
+        self.bundle_path = os.path.abspath(bundle_path)
+        self.file = open(self.bundle_path, 'rb')
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self.file.close()
+            raise BundleError(f"{bundle_path} is empty")
+        self.view = memoryview(self.map)
+        try:
+            self.read_header()
+            if verify:
+                self.verify()
+            records = json.loads(bytes(self.view[self.metadata_offset:self.metadata_offset + self.metadata_length]))
+        except BaseException:
+            self.close()
+            raise
+        self.entries = {}
+        for record in records:
+            entry = BundleEntry(self, record)
+            self.entries[entry.key] = entry
+        self.errors = {}
+
+    def read_header(self):
+        """Parse and sanity check the fixed-size header."""
+        if len(self.view) < HEADER_SIZE:
+            raise BundleError(f"{self.bundle_path} is too small to be a bundle")
+        (magic, version, self.skill_count, self.metadata_offset, self.metadata_length,
+         self.prompts_offset, self.prompts_length, self.fingerprint, self.checksum) = struct.unpack_from(HEADER_FORMAT, self.view)
+        if magic != BUNDLE_MAGIC:
+            raise BundleError(f"{self.bundle_path} is not a skill bundle")
+        if version != BUNDLE_VERSION:
+            raise BundleError(f"{self.bundle_path} has unsupported version {version}")
+        if self.prompts_offset + self.prompts_length > len(self.view):
+            raise BundleError(f"{self.bundle_path} is truncated")
+
+    def verify(self):
+        """Check the content checksum. Raises BundleError if the bundle is corrupt."""
+        digest = hashlib.sha256()
+        digest.update(self.view[self.metadata_offset:self.metadata_offset + self.metadata_length])
+        digest.update(self.view[self.prompts_offset:self.prompts_offset + self.prompts_length])
+        if digest.digest() != self.checksum:
+            raise BundleError(f"{self.bundle_path} failed its checksum")
+
+    def is_stale(self, skills_dir):
+        """Check whether the Skills directory changed since the bundle was built."""
+        return get_source_fingerprint(skills_dir) != self.fingerprint
+
+    def get_prompt_bytes(self, key):
+        """Get the UTF-8 prompt body of a skill as a zero-copy memoryview into the bundle."""
+        entry = self.entries[key]
+        start = self.prompts_offset + entry.prompt_offset
+        return self.view[start:start + entry.prompt_length]
+
+    def get(self, key):
+        return self.entries[key]
+
+    def get_prompt(self, key):
+        return self.entries[key].read_prompt()
+
+    def find(self, name):
+        return [entry for entry in self.entries.values() if entry.name == name]
+
+    def keys(self):
+        return self.entries.keys()
+
+    def close(self):
+        """
+        Release the memory map and file handle. Raises BufferError if prompt views from get_prompt_bytes are still
+        alive; the file handle is closed anyway and the map is released once those views are.
+        """
+        try:
+            if getattr(self, 'view', None) is not None:
+                self.view.release()
+                self.view = None
+            if getattr(self, 'map', None) is not None:
+                self.map.close()
+                self.map = None
+        finally:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries.values())
+
+    def __contains__(self, key):
+        return key in self.entries
+
+
+def load_bundle(bundle_path, skills_dir=None, rebuild=True, verify=False):
+    """
+    Open a bundle. When skills_dir is given, a missing or stale bundle is rebuilt first
+    (or BundleError is raised if rebuild is False).
+    """
+    if skills_dir is not None:
+        stale = True
+        if os.path.isfile(bundle_path):
+            try:
+                with SkillBundle(bundle_path) as bundle:
+                    stale = bundle.is_stale(skills_dir)
+            except BundleError:
+                stale = True
+        if stale:
+            if not rebuild:
+                raise BundleError(f"{bundle_path} is missing or out of date with {skills_dir}")
+            build_bundle(skills_dir, bundle_path)
+    return SkillBundle(bundle_path, verify)
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack a Skills directory into a single bundle file, or inspect a bundle.")
+    parser.add_argument("--bundle", required=True, help="Path of the bundle file.")
+    parser.add_argument("--skills", help="Path to directory containing .skill files.")
+    parser.add_argument("--build", action="store_true", help="Build the bundle from --skills.")
+    parser.add_argument("--check", action="store_true", help="Verify the checksum and, with --skills, exit with status 1 if the bundle is stale.")
+    parser.add_argument("--show", help="Dotted key of a skill whose prompt should be printed (e.g. Chat.chat).")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    instrumentation.setup(args)
+
+    if args.build:
+        if not args.skills:
+            parser.error("--build requires --skills")
+        count = build_bundle(args.skills, args.bundle)
+        print(f"Packed {count} skills into {args.bundle}")
+        return
+
+    try:
+        bundle = SkillBundle(args.bundle, verify=args.check)
+    except (OSError, BundleError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    with bundle:
+        if args.check:
+            if args.skills and bundle.is_stale(args.skills):
+                print(f"{args.bundle} is out of date with {args.skills}")
+                sys.exit(1)
+            print(f"{args.bundle} is valid ({len(bundle)} skills)")
+        elif args.show:
+            if args.show not in bundle:
+                print(f"Skill {args.show} not found.")
+                return
+            sys.stdout.write(bundle.get_prompt(args.show))
+        else:
+            for entry in bundle:
+                print(entry.key)
+            print(f"\nSkills in bundle: {len(bundle)}")
+
+if __name__ == "__main__":
+    main()
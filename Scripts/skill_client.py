@@ -0,0 +1,271 @@
+#!/usr/bin/env python
+"""
+Pooled HTTP client for OpenAI-compatible completion endpoints.
+Connections are kept alive and reused across requests and threads, and transient errors
+(rate limits, 5xx responses, dropped connections) are retried with exponential backoff and jitter.
+The endpoint is read from OPENAI_API_BASE and the key from OPENAI_API_KEY, in the environment or in .env,
+so the client can be pointed at a local stub server (see stub_model_server.py).
+"""
+import os
+import sys
+import json
+import time
+import queue
+import random
+import argparse
+import threading
+import http.client
+from urllib.parse import urlsplit
+
+import instrumentation
+
+DEFAULT_API_BASE = "https://api.openai.com/v1"
+DEFAULT_MODEL = "text-davinci-003"
+# Skill settings that are passed through to the completion request.
+COMPLETION_SETTINGS = ('max_tokens', 'temperature', 'top_p', 'presence_penalty', 'frequency_penalty', 'stop')
+TRANSIENT_STATUS = (408, 409, 429, 500, 502, 503, 504)
+CONNECTION_ERRORS = (http.client.HTTPException, OSError)
+POOL_SIZE = 8
+REQUEST_TIMEOUT = 60.0
+api_configs = {}
+
+
+class CompletionError(Exception):
+    """Raised when a completion request fails. transient is True for errors worth retrying."""
+
+    def __init__(self, message, status=None, transient=False):
+        super().__init__(message)
+        self.status = status
+        self.transient = transient
+
+
+def get_api_config(env_path=".env"):
+    """
+    Return (api_base, api_key) from the environment, falling back to the .env file.
+    The .env file is only parsed (and dotenv only imported) when the environment does not set both, once per process.
+    """
+    config = api_configs.get(env_path)
+    if config is None:
+        api_base = os.environ.get("OPENAI_API_BASE")
+        api_key = os.environ.get("OPENAI_API_KEY")
+        if not (api_base and api_key) and os.path.isfile(env_path):
+            from dotenv import dotenv_values
+            env_vars = dotenv_values(env_path)
+            api_base = api_base or env_vars.get("OPENAI_API_BASE")
+            api_key = api_key or env_vars.get("OPENAI_API_KEY")
+        config = api_configs[env_path] = (api_base or DEFAULT_API_BASE, api_key)
+    return config
+
+def build_completion_request(prompt, settings=None, model=None):
+    """Build the JSON body of a completion request from a skill's settings."""
+    settings = settings or {}
+    body = {'model': model or settings.get('model') or DEFAULT_MODEL, 'prompt': prompt}
+    for key in COMPLETION_SETTINGS:
+        value = settings.get(key)
+        if value is None or value == '' or value == []:
+            continue
+        body[key] = value
+    return body
+
+
+class SkillClient:
+    """
+    Thread-safe completion client over a pool of persistent HTTP connections.
+    Up to pool_size idle connections are kept for reuse. Use it as a context manager or call close().
+    """
+
+    def __init__(self, api_base=None, api_key=None, pool_size=POOL_SIZE, timeout=REQUEST_TIMEOUT,
+                 max_retries=5, base_delay=1.0):
+        if api_base is None or api_key is None:
+            env_base, env_key = get_api_config()
+            api_base = api_base or env_base
+            api_key = api_key or env_key
+        parts = urlsplit(api_base)
+        if parts.scheme not in ('http', 'https'):
+            raise ValueError(f"Unsupported API base {api_base}")
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.path = parts.path.rstrip('/')
+        self.api_key = api_key
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.pool = queue.LifoQueue(maxsize=pool_size)
+        self.lock = threading.Lock()
+        self.connections_opened = 0
+        self.requests = 0
+        self.retries = 0
+
+    def get_connection(self):
+        """Take an idle connection from the pool or open a new one. Returns (connection, reused)."""
+        try:
+            return self.pool.get_nowait(), True
+        except queue.Empty:
+            pass
+        connection_class = http.client.HTTPSConnection if self.scheme == 'https' else http.client.HTTPConnection
+        with self.lock:
+            self.connections_opened += 1
+        return connection_class(self.host, self.port, timeout=self.timeout), False
+
+    def release_connection(self, connection):
+        """Return a connection to the pool, closing it if the pool is full."""
+        try:
+            self.pool.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    def get_headers(self):
+        headers = {'Content-Type': 'application/json', 'Connection': 'keep-alive'}
+        if self.api_key:
+            headers['Authorization'] = f"Bearer {self.api_key}"
+        return headers
+
+    def send(self, endpoint, body):
+        """
+        POST a JSON body and return (connection, response) with the response unread.
+        Reused connections that the server already closed are discarded and the request is sent again.
+        """
+        data = json.dumps(body).encode('utf-8')
+        while True:
+            connection, reused = self.get_connection()
+            try:
+                connection.request('POST', self.path + endpoint, data, self.get_headers())
+                return connection, connection.getresponse()
+            except CONNECTION_ERRORS as e:
+                connection.close()
+                if reused:
+                    continue
+                raise CompletionError(f"Connection failed: {e}", transient=True)
+
+    def post(self, endpoint, body):
+        """POST a JSON body and return the decoded JSON response. Raises CompletionError on failure."""
+        connection, response = self.send(endpoint, body)
+        try:
+            payload = response.read()
+        except CONNECTION_ERRORS as e:
+            connection.close()
+            raise CompletionError(f"Connection failed: {e}", transient=True)
+        if response.will_close:
+            connection.close()
+        else:
+            self.release_connection(connection)
+        with self.lock:
+            self.requests += 1
+        if response.status != 200:
+            raise CompletionError(f"HTTP {response.status}: {payload[:200].decode('utf-8', 'replace')}",
+                                  response.status, response.status in TRANSIENT_STATUS)
+        try:
+            return json.loads(payload)
+        except ValueError:
+            raise CompletionError("Response is not valid JSON")
+
+    def with_retries(self, request):
+        """Call request(), retrying transient CompletionErrors with exponential backoff and jitter."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                return request()
+            except CompletionError as e:
+                if not e.transient or attempt == self.max_retries:
+                    instrumentation.count('model_errors')
+                    raise
+                instrumentation.count('model_retries')
+                with self.lock:
+                    self.retries += 1
+                time.sleep(self.base_delay * (2 ** attempt) * (1 + random.random()))
+
+    def complete(self, prompt, settings=None, model=None):
+        """Request a completion for a prompt using a skill's settings and return the completion text."""
+        body = build_completion_request(prompt, settings, model)
+        with instrumentation.phase('model_call'):
+            response = self.with_retries(lambda: self.post('/completions', body))
+        try:
+            return response['choices'][0]['text']
+        except (KeyError, IndexError, TypeError):
+            raise CompletionError("Response has no completion text")
+
+    def open_stream(self, endpoint, body):
+        """POST a streaming request and return (connection, response) once the server has accepted it."""
+        connection, response = self.send(endpoint, body)
+        if response.status != 200:
+            try:
+                payload = response.read()
+            except CONNECTION_ERRORS:
+                payload = b''
+            connection.close()
+            raise CompletionError(f"HTTP {response.status}: {payload[:200].decode('utf-8', 'replace')}",
+                                  response.status, response.status in TRANSIENT_STATUS)
+        return connection, response
+
+    def stream(self, prompt, settings=None, model=None):
+        """
+        Stream a completion, yielding pieces of text as the server sends them.
+        Errors before the first piece are retried like complete(). Closing the generator early (for example after
+        a stop sequence) closes the connection, which cancels the request upstream.
+        """
+        body = build_completion_request(prompt, settings, model)
+        body['stream'] = True
+        connection, response = self.with_retries(lambda: self.open_stream('/completions', body))
+        finished = False
+        try:
+            while True:
+                line = response.readline()
+                if not line:
+                    raise CompletionError("Stream ended before [DONE]")
+                line = line.strip()
+                if not line.startswith(b'data:'):
+                    continue
+                data = line[5:].strip()
+                if data == b'[DONE]':
+                    response.read()
+                    finished = True
+                    return
+                try:
+                    text = json.loads(data)['choices'][0]['text']
+                except (ValueError, KeyError, IndexError, TypeError):
+                    raise CompletionError("Malformed stream event")
+                if text:
+                    yield text
+        except CONNECTION_ERRORS as e:
+            raise CompletionError(f"Stream interrupted: {e}")
+        finally:
+            with self.lock:
+                self.requests += 1
+            if finished and not response.will_close:
+                self.release_connection(connection)
+            else:
+                connection.close()
+
+    def close(self):
+        """Close every idle connection."""
+        while True:
+            try:
+                self.pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Send one prompt to an OpenAI-compatible completion endpoint.")
+    parser.add_argument("prompt", help="Prompt text.")
+    parser.add_argument("--api_base", default=None, help="API base URL. Defaults to OPENAI_API_BASE.")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="Model name.")
+    parser.add_argument("--max_tokens", type=int, default=256, help="Completion token limit.")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    instrumentation.setup(args)
+
+    with SkillClient(args.api_base) as client:
+        try:
+            sys.stdout.write(client.complete(args.prompt, {'max_tokens': args.max_tokens}, args.model) + '\n')
+        except CompletionError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+#!/usr/bin/env python
+"""
+Runs a plan of chained skills as a DAG on asyncio.
+A plan is a JSON object mapping node names to skill invocations:
+
+    {
+      "nodes": {
+        "classify": {"skill": "ClassificationSkill.importance"},
+        "summary":  {"skill": "SummarizeSkill.notegen"},
+        "entities": {"skill": "CodingSkill.entity", "timeout": 30},
+        "email":    {"skill": "WriterSkill.emailgen",
+                     "inputs": {"input": "Importance: {{$classify}}\\n{{$summary}}\\nPeople: {{$entities}}"}}
+      },
+      "output": "email"
+    }
+
+Every node receives the plan's input values, overlaid with its own "inputs", which use the same {{$var}} syntax
+as skill prompts. A {{$name}} that refers to another node is replaced by that node's output and makes this node
+depend on it; any other name refers to a plan input. Nodes start as soon as all the nodes they depend on have
+finished, so independent branches run concurrently and a plan takes as long as its critical path. A node can set
+a "timeout" in seconds; a request that times out is abandoned (its thread finishes in the background and the
+result is dropped), but it keeps its concurrency slot until the thread is done, so a stuck call cannot make other
+nodes wait for a thread inside their own timeout. When a node fails or times out, every node downstream of it is cancelled.
+"""
+import sys
+import json
+import time
+import asyncio
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from skill_registry import load_registry
+from skill_template import SkillRenderer, compile_template
+from skill_client import SkillClient
+import instrumentation
+
+CONCURRENCY = 8
+
+
+class PipelineError(Exception):
+    """Raised when a plan is not a valid DAG of known skills."""
+
+
+class PipelineNode:
+    """One skill invocation in a plan."""
+    __slots__ = ('name', 'skill', 'inputs', 'timeout', 'depends')
+
+    def __init__(self, name, skill, inputs, timeout, depends):
+        self.name = name
+        self.skill = skill
+        self.inputs = inputs
+        self.timeout = timeout
+        self.depends = depends
+
+
+def parse_plan(plan, registry):
+    """Check a plan and compile its nodes. Returns the nodes in a valid execution order."""
+    nodes = plan.get('nodes') if isinstance(plan, dict) else None
+    if not isinstance(nodes, dict) or not nodes:
+        raise PipelineError("Plan has no nodes")
+    parsed = {}
+    for name, spec in nodes.items():
+        if not isinstance(spec, dict) or 'skill' not in spec:
+            raise PipelineError(f"Node {name} has no skill")
+        if spec['skill'] not in registry:
+            raise PipelineError(f"Node {name} uses unknown skill {spec['skill']}")
+        inputs = {}
+        depends = set()
+        for input_name, value in (spec.get('inputs') or {}).items():
+            template = compile_template(value if isinstance(value, str) else json.dumps(value))
+            inputs[input_name] = template
+            depends.update(variable for variable in template.variable_names if variable in nodes)
+        if name in depends:
+            raise PipelineError(f"Node {name} depends on itself")
+        timeout = spec.get('timeout')
+        if timeout is not None and (not isinstance(timeout, (int, float)) or timeout <= 0):
+            raise PipelineError(f"Node {name} has an invalid timeout")
+        parsed[name] = PipelineNode(name, spec['skill'], inputs, timeout, sorted(depends))
+    output = plan.get('output')
+    if output is not None and output not in parsed:
+        raise PipelineError(f"Plan output {output} is not a node")
+    return topological_order(parsed)
+
+def topological_order(nodes):
+    """Order nodes so every node comes after the nodes it depends on. Raises PipelineError on a cycle."""
+    remaining = {name: len(node.depends) for name, node in nodes.items()}
+    dependents = {name: [] for name in nodes}
+    for node in nodes.values():
+        for dependency in node.depends:
+            dependents[dependency].append(node.name)
+    ready = [name for name, count in remaining.items() if count == 0]
+    order = []
+    while ready:
+        name = ready.pop()
+        order.append(nodes[name])
+        for dependent in dependents[name]:
+            remaining[dependent] -= 1
+            if remaining[dependent] == 0:
+                ready.append(dependent)
+    if len(order) != len(nodes):
+        cycle = sorted(name for name, count in remaining.items() if count)
+        raise PipelineError(f"Plan has a cycle between {', '.join(cycle)}")
+    return order
+
+def get_downstream(nodes, name):
+    """Names of every node that depends on name, directly or indirectly."""
+    dependents = {}
+    for node in nodes:
+        for dependency in node.depends:
+            dependents.setdefault(dependency, []).append(node.name)
+    downstream = set()
+    stack = [name]
+    while stack:
+        for dependent in dependents.get(stack.pop(), []):
+            if dependent not in downstream:
+                downstream.add(dependent)
+                stack.append(dependent)
+    return downstream
+
+
+class PipelineRunner:
+    """
+    Executes parsed plans. Model calls run on a thread pool through a shared SkillClient (and ResultCache if given),
+    with at most concurrency calls in flight.
+    """
+
+    def __init__(self, registry, client, cache=None, concurrency=CONCURRENCY, model=None):
+        self.registry = registry
+        self.renderer = SkillRenderer(registry)
+        self.client = client
+        self.cache = cache
+        self.concurrency = concurrency
+        self.model = model
+        self.executor = ThreadPoolExecutor(concurrency)
+
+    def complete(self, node, values):
+        """Render and complete one node. Runs on the thread pool."""
+        entry = self.registry.get(node.skill)
+        prompt = self.renderer.render(node.skill, values)
+        if self.cache is not None:
+            return self.cache.complete(self.client, entry, prompt, self.model)
+        return self.client.complete(prompt, entry.settings, self.model)
+
+    async def run(self, nodes, values=None):
+        """
+        Run parsed nodes with the plan input values.
+        Returns a dict mapping each node name to {"status", "output", "error", "started", "elapsed"}, where status is
+        "ok", "failed", "timeout" or "cancelled" and times are seconds from the start of the run.
+        """
+        values = dict(values or {})
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        start = time.perf_counter()
+        results = {}
+        tasks = {}
+        cancelled_by = {}
+
+        def cancel_downstream(name):
+            for dependent in get_downstream(nodes, name):
+                task = tasks[dependent]
+                if not task.done():
+                    cancelled_by.setdefault(dependent, name)
+                    task.cancel()
+
+        def release(request):
+            semaphore.release()
+            if not request.cancelled():
+                # Marks the error of an abandoned request as retrieved.
+                request.exception()
+
+        async def run_node(node):
+            try:
+                for dependency in node.depends:
+                    # Shielded so that cancelling this node does not cancel the node it is waiting for.
+                    await asyncio.shield(tasks[dependency])
+                    if results[dependency]['status'] != 'ok':
+                        raise asyncio.CancelledError()
+                context = dict(values)
+                context.update((dependency, results[dependency]['output']) for dependency in node.depends)
+                node_values = dict(values)
+                node_values.update((name, template.render(context)) for name, template in node.inputs.items())
+                await semaphore.acquire()
+                started = time.perf_counter() - start
+                request = loop.run_in_executor(self.executor, self.complete, node, node_values)
+                # The slot is released when the thread finishes, not when the node stops waiting for it.
+                request.add_done_callback(release)
+                try:
+                    output = await asyncio.wait_for(asyncio.shield(request), node.timeout)
+                except asyncio.TimeoutError:
+                    results[node.name] = {'status': 'timeout', 'output': None,
+                                          'error': f"Timed out after {node.timeout}s",
+                                          'started': started, 'elapsed': time.perf_counter() - start - started}
+                    cancel_downstream(node.name)
+                    return
+                except Exception as e:
+                    results[node.name] = {'status': 'failed', 'output': None, 'error': str(e),
+                                          'started': started, 'elapsed': time.perf_counter() - start - started}
+                    cancel_downstream(node.name)
+                    return
+                results[node.name] = {'status': 'ok', 'output': output, 'error': None,
+                                      'started': started, 'elapsed': time.perf_counter() - start - started}
+            except asyncio.CancelledError:
+                failed = cancelled_by.get(node.name) or ', '.join(
+                    dependency for dependency in node.depends if results.get(dependency, {}).get('status') != 'ok')
+                results[node.name] = {'status': 'cancelled', 'output': None,
+                                      'error': f"Upstream {failed} did not complete",
+                                      'started': None, 'elapsed': 0.0}
+
+        for node in nodes:
+            tasks[node.name] = asyncio.ensure_future(run_node(node))
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+        return {node.name: results[node.name] for node in nodes}
+
+    def run_plan(self, plan, values=None):
+        """Parse and run a plan synchronously. Returns the per-node results."""
+        nodes = parse_plan(plan, self.registry)
+        return asyncio.run(self.run(nodes, values))
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a plan of chained skills, with independent steps in parallel.")
+    parser.add_argument("--skills", required=True, help="Path to directory containing .skill files.")
+    parser.add_argument("--plan", required=True, help="JSON file describing the plan.")
+    parser.add_argument("--inputs", help="JSON object of plan input values.")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="Model calls in flight at once.")
+    parser.add_argument("--model", default=None, help="Override the model from each skill's settings.")
+    parser.add_argument("--api_base", default=None, help="API base URL. Defaults to OPENAI_API_BASE.")
+    parser.add_argument("--json", action="store_true", help="Print every node's result as JSON.")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    instrumentation.setup(args)
+
+    registry = load_registry(args.skills)
+    with open(args.plan, 'r', encoding='utf-8') as f:
+        plan = json.load(f)
+    with SkillClient(args.api_base) as client:
+        runner = PipelineRunner(registry, client, concurrency=args.concurrency, model=args.model)
+        start = time.perf_counter()
+        try:
+            results = runner.run_plan(plan, json.loads(args.inputs) if args.inputs else {})
+        except PipelineError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        finally:
+            runner.close()
+        elapsed = time.perf_counter() - start
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for name, result in results.items():
+            detail = f"{result['elapsed']:.2f}s" if result['status'] == 'ok' else result['error']
+            print(f"{name:<20} {result['status']:<10} {detail}")
+        output = plan.get('output')
+        if output and results[output]['status'] == 'ok':
+            print(f"\n{results[output]['output']}")
+    steps = sum(result['elapsed'] for result in results.values())
+    print(f"Plan finished in {elapsed:.2f}s ({steps:.2f}s of model calls).")
+    if any(result['status'] != 'ok' for result in results.values()):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
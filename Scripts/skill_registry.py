@@ -0,0 +1,376 @@
+#!/usr/bin/env python
+"""
+Registry of .skill files. Walks a Skills directory once and builds a compact index of every skill
+(name, category path, description, inputs, settings and the byte offset/length of the skill: | block).
+Prompt bodies are only read from disk when a skill is actually used.
+"""
+import os
+import re
+import json
+import argparse
+
+import instrumentation
+
+SKILL_EXTENSION = '.skill'
+PROMPT_KEY = 'skill'
+SECTION_PATTERN = re.compile(r'^([A-Za-z_][\w-]*):(.*)$')
+
+
+def parse_scalar(value):
+    """Convert a YAML-like scalar from a .skill file into a Python value."""
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in ('"', "'"):
+        return value[1:-1]
+    lowered = value.lower()
+    if lowered == 'true':
+        return True
+    if lowered == 'false':
+        return False
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+def split_sections(lines):
+    """
+    Split the lines of a .skill file into its top-level sections.
+    Returns a list of (key, inline_value, start, end) where lines[start] is the "key:" line and
+    lines[start+1:end] is the section body. Lines before the first key are not part of any section.
+    """
+    sections = []
+    for index, line in enumerate(lines):
+        if not line or line[0] in ' \t\r\n':
+            continue
+        match = SECTION_PATTERN.match(line.rstrip('\r\n'))
+        if not match:
+            continue
+        if sections:
+            key, inline, start, _ = sections[-1]
+            sections[-1] = (key, inline, start, index)
+        sections.append((match.group(1), match.group(2).strip(), index, len(lines)))
+    return sections
+
+
+def join_continuations(lines):
+    """Strip the lines of a section, joining double-quoted values that span several lines the way YAML folds them."""
+    joined = []
+    pending = None
+    for line in lines:
+        stripped = line.strip()
+        if pending is not None:
+            pending = f"{pending} {stripped}" if stripped else pending
+            if stripped.endswith('"'):
+                joined.append(pending)
+                pending = None
+            continue
+        value = stripped[2:].strip() if stripped.startswith('- ') else stripped
+        if ':' in value and not value.startswith(('"', "'")):
+            value = value.split(':', 1)[1].strip()
+        if value.startswith('"') and (len(value) == 1 or not value.endswith('"')):
+            pending = stripped
+            continue
+        joined.append(stripped)
+    if pending is not None:
+        joined.append(pending)
+    return joined
+
+
+def parse_inputs(lines):
+    """Parse the body of an inputs: section into a list of dicts."""
+    inputs = []
+    for stripped in join_continuations(lines):
+        if not stripped:
+            continue
+        if stripped.startswith('- '):
+            inputs.append({})
+            stripped = stripped[2:].strip()
+        if not inputs or ':' not in stripped:
+            continue
+        key, value = stripped.split(':', 1)
+        inputs[-1][key.strip()] = parse_scalar(value)
+    return inputs
+
+
+def parse_settings(lines):
+    """Parse the body of a settings: section into a dict. Keys without a value collect the list that follows."""
+    settings = {}
+    last_key = None
+    for stripped in join_continuations(lines):
+        if not stripped:
+            continue
+        if stripped.startswith('- ') or stripped == '-':
+            if last_key is None:
+                continue
+            if not isinstance(settings[last_key], list):
+                settings[last_key] = []
+            settings[last_key].append(parse_scalar(stripped[1:]))
+            continue
+        if ':' not in stripped:
+            continue
+        key, value = stripped.split(':', 1)
+        last_key = key.strip()
+        settings[last_key] = parse_scalar(value) if value.strip() else []
+    return settings
+
+
+def dedent_block(text, header='|'):
+    """
+    Turn the raw lines of a "skill: |" block into the prompt string.
+    The indentation of the first non-blank line is removed from every line and the block
+    chomping indicator of the header (|, |- or |+) is applied to trailing newlines.
+    """
+    lines = text.splitlines()
+    indent = 0
+    for line in lines:
+        if line.strip():
+            indent = len(line) - len(line.lstrip(' '))
+            break
+    body = []
+    for line in lines:
+        if not line.strip():
+            body.append(line[indent:])
+        else:
+            body.append(line[min(indent, len(line) - len(line.lstrip(' '))):])
+    if header.endswith('+'):
+        return '\n'.join(body) + '\n' if body else ''
+    while body and not body[-1]:
+        body.pop()
+    if not body:
+        return ''
+    if header.endswith('-'):
+        return '\n'.join(body)
+    return '\n'.join(body) + '\n'
+
+
+def get_category_from_path(skill_path, skills_dir):
+    """Get the dotted category path of a skill file relative to the Skills directory, e.g. "QASkill"."""
+    rel_parent = os.path.relpath(os.path.dirname(os.path.abspath(skill_path)), skills_dir)
+    if rel_parent == os.curdir:
+        return ''
+    return '.'.join(rel_parent.split(os.sep))
+
+
+class SkillEntry:
+    """Index record for a single .skill file. The prompt body itself is not held in memory."""
+    __slots__ = ('name', 'category', 'path', 'description', 'skill_class', 'inputs', 'settings',
+                 'prompt_header', 'prompt_offset', 'prompt_length', 'mtime', 'size')
+
+    def __init__(self, name, category, path, description, skill_class, inputs, settings,
+                 prompt_header, prompt_offset, prompt_length, mtime=0.0, size=0):
+        self.name = name
+        self.category = category
+        self.path = path
+        self.description = description
+        self.skill_class = skill_class
+        self.inputs = inputs
+        self.settings = settings
+        self.prompt_header = prompt_header
+        self.prompt_offset = prompt_offset
+        self.prompt_length = prompt_length
+        self.mtime = mtime
+        self.size = size
+
+    @property
+    def key(self):
+        """Dotted name of the skill including its category, e.g. "Chat.chat"."""
+        if self.category:
+            return f"{self.category}.{self.name}"
+        return self.name
+
+    @property
+    def input_defaults(self):
+        """Map of input name to its default value."""
+        return {item['name']: item.get('default', '') for item in self.inputs if 'name' in item}
+
+    def read_prompt(self):
+        """Read the prompt body from disk using the stored offset and length."""
+        with open(self.path, 'rb') as f:
+            f.seek(self.prompt_offset)
+            raw = f.read(self.prompt_length)
+        return dedent_block(raw.decode('utf-8'), self.prompt_header)
+
+    def to_dict(self):
+        """Serialize the index record to a dict."""
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    def __repr__(self):
+        return f"SkillEntry({self.key!r}, path={self.path!r})"
+
+
+def index_skill_file(skill_path, skills_dir):
+    """Build a SkillEntry for a .skill file without keeping the prompt text."""
+    with open(skill_path, 'rb') as f:
+        data = f.read()
+    stat = os.stat(skill_path)
+
+    raw_lines = data.splitlines(keepends=True)
+    offsets = [0]
+    for raw in raw_lines:
+        offsets.append(offsets[-1] + len(raw))
+
+    # Only top-level keys and the small sections are decoded, the prompt block is skipped.
+    top_level = [raw.decode('utf-8') if raw[:1] not in (b' ', b'\t', b'\r', b'\n') else ' '
+                 for raw in raw_lines]
+    sections = split_sections(top_level)
+    fields = {}
+    inputs = []
+    settings = {}
+    prompt_header = '|'
+    prompt_offset = prompt_length = 0
+    for key, inline, start, end in sections:
+        if key == PROMPT_KEY:
+            prompt_header = inline or '|'
+            prompt_offset = offsets[start + 1]
+            prompt_length = offsets[end] - offsets[start + 1]
+            continue
+        body = [raw.decode('utf-8') for raw in raw_lines[start + 1:end]]
+        if key == 'inputs':
+            inputs = parse_inputs(body)
+        elif key == 'settings':
+            settings = parse_settings(body)
+        else:
+            fields[key] = parse_scalar(inline)
+
+    name = fields.get('name')
+    if not name:
+        name = os.path.splitext(os.path.basename(skill_path))[0]
+    return SkillEntry(
+        name=str(name),
+        category=get_category_from_path(skill_path, skills_dir),
+        path=os.path.abspath(skill_path),
+        description=str(fields.get('description', '')),
+        skill_class=str(fields.get('skill_class', 'semantic')),
+        inputs=inputs,
+        settings=settings,
+        prompt_header=prompt_header,
+        prompt_offset=prompt_offset,
+        prompt_length=prompt_length,
+        mtime=stat.st_mtime,
+        size=stat.st_size,
+    )
+
+
+def iter_skill_files(skills_dir, ignore=()):
+    """Yield the path of every .skill file under the directory in a stable order, skipping the ignored directories."""
+    ignore = set(os.path.abspath(path) for path in ignore)
+    for root, dirs, files in os.walk(skills_dir):
+        dirs[:] = sorted(name for name in dirs if name != '.git' and os.path.abspath(os.path.join(root, name)) not in ignore)
+        for file in sorted(files):
+            if file.endswith(SKILL_EXTENSION):
+                yield os.path.join(root, file)
+
+
+class SkillRegistry:
+    """
+    Index of every .skill file under a Skills directory.
+    Skills are looked up by their dotted key (e.g. "Chat.chat") and prompt bodies are loaded lazily.
+    """
+
+    def __init__(self, skills_dir):
+        self.skills_dir = os.path.abspath(skills_dir)
+        self.entries = {}
+        self.paths = {}
+        self.errors = {}
+
+    def load(self):
+        """Walk the Skills directory once and index every .skill file."""
+        self.entries.clear()
+        self.paths.clear()
+        self.errors.clear()
+        with instrumentation.phase('walk'):
+            skill_paths = list(iter_skill_files(self.skills_dir))
+        with instrumentation.phase('parse'):
+            for skill_path in skill_paths:
+                self.add_file(skill_path)
+        return self
+
+    def add_file(self, skill_path):
+        """Index (or re-index) a single .skill file. Returns the entry, or None if it could not be read or its key is taken."""
+        skill_path = os.path.abspath(skill_path)
+        self.remove_file(skill_path)
+        try:
+            entry = index_skill_file(skill_path, self.skills_dir)
+        except (OSError, UnicodeDecodeError) as e:
+            self.errors[skill_path] = str(e)
+            return None
+        existing = self.entries.get(entry.key)
+        if existing is not None:
+            # Two files with the same dotted key: keep the one indexed first.
+            self.errors[skill_path] = f"duplicate skill key {entry.key}, already defined by {existing.path}"
+            return None
+        self.entries[entry.key] = entry
+        self.paths[skill_path] = entry.key
+        return entry
+
+    def remove_file(self, skill_path):
+        """Drop a .skill file from the index. Returns the removed entry if there was one."""
+        skill_path = os.path.abspath(skill_path)
+        self.errors.pop(skill_path, None)
+        key = self.paths.pop(skill_path, None)
+        if key is None or self.entries[key].path != skill_path:
+            return None
+        return self.entries.pop(key)
+
+    def get(self, key):
+        """Get the index entry for a skill by its dotted key."""
+        return self.entries[key]
+
+    def get_prompt(self, key):
+        """Load the prompt body for a skill from disk."""
+        return self.entries[key].read_prompt()
+
+    def find(self, name):
+        """Get all entries whose bare name matches, regardless of category."""
+        return [entry for entry in self.entries.values() if entry.name == name]
+
+    def keys(self):
+        return self.entries.keys()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries.values())
+
+    def __contains__(self, key):
+        return key in self.entries
+
+
+def load_registry(skills_dir):
+    """Build a registry for a Skills directory."""
+    return SkillRegistry(skills_dir).load()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index .skill files and optionally print a skill's prompt.")
+    parser.add_argument("--skills", required=True, help="Path to directory containing .skill files.")
+    parser.add_argument("--show", help="Dotted key of a skill whose prompt should be printed (e.g. Chat.chat).")
+    parser.add_argument("--json", action="store_true", help="Print the full index as JSON.")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    instrumentation.setup(args)
+
+    registry = load_registry(args.skills)
+    for path, error in registry.errors.items():
+        print(f"Error indexing {path}: {error}")
+
+    if args.show:
+        if args.show not in registry:
+            print(f"Skill {args.show} not found.")
+            return
+        print(registry.get_prompt(args.show), end='')
+    elif args.json:
+        print(json.dumps([entry.to_dict() for entry in registry], indent=2))
+    else:
+        for entry in registry:
+            input_names = ', '.join(item.get('name', '?') for item in entry.inputs)
+            print(f"{entry.key}({input_names})")
+        print(f"\nSkills indexed: {len(registry)}")
+
+if __name__ == "__main__":
+    main()
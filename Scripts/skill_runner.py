@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+"""
+Runs one skill over every row of a JSONL file.
+Each input line is a JSON object of input values; missing inputs fall back to the skill's defaults.
+Rows are read as a stream and dispatched to a thread pool sharing one pooled SkillClient. At most max_pending
+rows are in flight at once, so memory stays flat no matter how large the input is.
+
+Results are appended to the output JSONL as they complete, one {"index", "output"} or {"index", "error"} object
+per line, where index is the line number of the row in the input. The output file doubles as the checkpoint:
+rerunning with the same output skips every row already recorded, so a crashed run resumes where it stopped.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from skill_registry import load_registry
+from skill_template import SkillRenderer
+from skill_client import SkillClient, CompletionError, POOL_SIZE
+from result_cache import ResultCache, RESULT_CACHE_DIR, parse_ttls
+import instrumentation
+
+CONCURRENCY = 8
+PENDING_PER_WORKER = 4
+PROGRESS_INTERVAL = 1000
+
+
+def load_checkpoint(output_path, retry_failed=False):
+    """
+    Read the indexes of the rows already recorded in an output file.
+    A partial last line left by a crash is cut off. Rows that failed count as done unless retry_failed is set.
+    """
+    done = set()
+    if not os.path.isfile(output_path):
+        return done
+    good_length = 0
+    with open(output_path, 'rb') as f:
+        for line in f:
+            if not line.endswith(b'\n'):
+                break
+            try:
+                result = json.loads(line)
+                index = result['index']
+            except (ValueError, KeyError, TypeError):
+                break
+            if 'output' in result or not retry_failed:
+                done.add(index)
+            good_length += len(line)
+    if good_length != os.path.getsize(output_path):
+        with open(output_path, 'r+b') as f:
+            f.truncate(good_length)
+    return done
+
+def read_rows(input_path, done=()):
+    """Yield (index, row) for every input line not in done. Blank lines are skipped but keep their index."""
+    with open(input_path, 'r', encoding='utf-8') as f:
+        for index, line in enumerate(f):
+            if index in done or not line.strip():
+                continue
+            yield index, line
+
+def run_row(client, template, entry, index, line, model=None, cache=None):
+    """Render and complete one input row, through the result cache if one is given. Returns its result record."""
+    try:
+        values = json.loads(line)
+        if not isinstance(values, dict):
+            raise ValueError("row is not a JSON object")
+    except ValueError as e:
+        return {'index': index, 'error': f"Invalid row: {e}"}
+    try:
+        with instrumentation.phase('render'):
+            prompt = template.render(values)
+        if cache is not None:
+            return {'index': index, 'output': cache.complete(client, entry, prompt, model)}
+        return {'index': index, 'output': client.complete(prompt, entry.settings, model)}
+    except CompletionError as e:
+        return {'index': index, 'error': str(e)}
+    except Exception as e:
+        # A row the template or client cannot handle fails on its own instead of stopping the batch.
+        return {'index': index, 'error': f"Invalid row: {type(e).__name__}: {e}"}
+
+def run_batch(registry, key, input_path, output_path, client, concurrency=CONCURRENCY, max_pending=None,
+              resume=True, retry_failed=False, model=None, cache=None):
+    """
+    Run a skill over every row of input_path, appending results to output_path.
+    Returns (succeeded, failed, skipped), where skipped counts the rows already recorded by a previous run.
+    """
+    template = SkillRenderer(registry).get_template(key)
+    entry = registry.get(key)
+    max_pending = max_pending or concurrency * PENDING_PER_WORKER
+    if resume:
+        done = load_checkpoint(output_path, retry_failed)
+    else:
+        done = set()
+        open(output_path, 'w').close()
+
+    succeeded = failed = 0
+    start = time.perf_counter()
+
+    def record(futures):
+        nonlocal succeeded, failed
+        with instrumentation.phase('write'):
+            for future in futures:
+                result = future.result()
+                out.write(json.dumps(result) + '\n')
+                if 'output' in result:
+                    succeeded += 1
+                else:
+                    failed += 1
+                if (succeeded + failed) % PROGRESS_INTERVAL == 0:
+                    elapsed = time.perf_counter() - start
+                    print(f"{succeeded + failed} rows done ({(succeeded + failed) / elapsed:.1f} rows/s)")
+            out.flush()
+
+    with open(output_path, 'a', encoding='utf-8') as out, ThreadPoolExecutor(concurrency) as pool:
+        pending = set()
+        for index, line in read_rows(input_path, done):
+            pending.add(pool.submit(run_row, client, template, entry, index, line, model, cache))
+            if len(pending) >= max_pending:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                record(finished)
+        while pending:
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            record(finished)
+    return succeeded, failed, len(done)
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a skill over every row of a JSONL file.")
+    parser.add_argument("--skills", required=True, help="Path to directory containing .skill files.")
+    parser.add_argument("--skill", required=True, help="Dotted key of the skill (e.g. SummarizeSkill.notegen).")
+    parser.add_argument("-i", "--input", required=True, help="JSONL file with one object of input values per line.")
+    parser.add_argument("-o", "--output", required=True, help="JSONL file to append results to. Also used to resume.")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="Requests in flight at once.")
+    parser.add_argument("--max_pending", type=int, default=None, help="Rows read ahead of the results. Defaults to 4 per request in flight.")
+    parser.add_argument("--model", default=None, help="Override the model from the skill's settings.")
+    parser.add_argument("--api_base", default=None, help="API base URL. Defaults to OPENAI_API_BASE.")
+    parser.add_argument("--max_retries", type=int, default=5, help="Retries for transient errors.")
+    parser.add_argument("--restart", action="store_true", help="Discard previous results instead of resuming.")
+    parser.add_argument("--retry_failed", action="store_true", help="When resuming, run rows that failed again. Their new result is appended after the old one.")
+    parser.add_argument("--cache_dir", default=RESULT_CACHE_DIR, help="Directory of the on-disk result cache.")
+    parser.add_argument("--no_cache", action="store_true", help="Always call the model and do not store results.")
+    parser.add_argument("--cache_sampled", action="store_true", help="Also cache results of skills with a temperature above 0.")
+    parser.add_argument("--cache_ttl", type=float, default=None, help="Seconds before a cached result expires.")
+    parser.add_argument("--ttl", nargs='*', help="Per-skill expiry as Category.skill=seconds.")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    instrumentation.setup(args)
+
+    registry = load_registry(args.skills)
+    if args.skill not in registry:
+        print(f"Skill {args.skill} not found.")
+        sys.exit(1)
+    cache = None
+    if not args.no_cache:
+        cache = ResultCache(args.cache_dir, ttls=parse_ttls(args.ttl), default_ttl=args.cache_ttl, cache_sampled=args.cache_sampled)
+    start = time.perf_counter()
+    with SkillClient(args.api_base, pool_size=max(POOL_SIZE, args.concurrency), max_retries=args.max_retries) as client:
+        succeeded, failed, skipped = run_batch(registry, args.skill, args.input, args.output, client, args.concurrency,
+                                               args.max_pending, not args.restart, args.retry_failed, args.model, cache)
+    elapsed = time.perf_counter() - start
+    print(f"Completed {succeeded} rows, {failed} failed, {skipped} already done, in {elapsed:.1f}s.")
+    print(f"Requests: {client.requests}, retries: {client.retries}, connections opened: {client.connections_opened}.")
+    if cache is not None:
+        stats = cache.get_stats()
+        print(f"Cache: {stats['memory_hits']} memory hits, {stats['disk_hits']} disk hits, {stats['misses']} misses, "
+              f"{stats['bypassed']} bypassed.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+#!/usr/bin/env python
+"""
+BM25 search over skill metadata for planner skill selection.
+An inverted index is built from each skill's name, category path, description and input names/descriptions.
+The index is persisted as JSON and kept up to date incrementally as individual .skill files change.
+"""
+import os
+import re
+import json
+import math
+import heapq
+import argparse
+
+from skill_registry import iter_skill_files, index_skill_file
+import instrumentation
+
+INDEX_FILE = '.skill_index.json'
+INDEX_VERSION = 2
+BM25_K1 = 1.2
+BM25_B = 0.75
+NAME_WEIGHT = 3
+CATEGORY_WEIGHT = 2
+TOKEN_PATTERN = re.compile(r'[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+')
+STOPWORDS = frozenset((
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'given', 'in', 'into', 'is', 'it',
+    'of', 'on', 'or', 'that', 'the', 'this', 'to', 'with',
+))
+
+
+def tokenize(text):
+    """Split text into lowercase terms, breaking camelCase and dotted names apart."""
+    return [term for term in (match.lower() for match in TOKEN_PATTERN.findall(text or '')) if term not in STOPWORDS]
+
+def get_entry_terms(entry):
+    """Get the weighted list of terms describing a skill."""
+    terms = tokenize(entry.name) * NAME_WEIGHT
+    terms += tokenize(entry.category) * CATEGORY_WEIGHT
+    terms += tokenize(entry.description)
+    for item in entry.inputs:
+        terms += tokenize(str(item.get('name', '')))
+        terms += tokenize(str(item.get('description', '')))
+    return terms
+
+
+class SkillIndex:
+    """
+    Inverted index of skill terms scored with BM25.
+    postings maps term -> {skill key: term frequency}, and documents maps skill key -> [path, mtime, length, terms].
+    When two files have the same skill key, the one indexed first is kept and the other is listed in duplicates.
+    """
+
+    def __init__(self, k1=BM25_K1, b=BM25_B):
+        self.k1 = k1
+        self.b = b
+        self.postings = {}
+        self.documents = {}
+        self.paths = {}
+        self.duplicates = {}
+        self.total_length = 0
+
+    def add_document(self, key, terms, path='', mtime=0.0):
+        """Add (or replace) a document given its terms. Returns False if another file already holds the key."""
+        document = self.documents.get(key)
+        if document is not None and path and document[0] and document[0] != path:
+            self.duplicates[path] = [key, mtime]
+            return False
+        self.duplicates.pop(path, None)
+        self.remove(key)
+        frequencies = {}
+        for term in terms:
+            frequencies[term] = frequencies.get(term, 0) + 1
+        for term, frequency in frequencies.items():
+            self.postings.setdefault(term, {})[key] = frequency
+        self.documents[key] = [path, mtime, len(terms), list(frequencies)]
+        if path:
+            self.paths[path] = key
+        self.total_length += len(terms)
+        return True
+
+    def add(self, entry):
+        """Add (or replace) a skill from its registry entry. Returns False if its key is already taken by another file."""
+        return self.add_document(entry.key, get_entry_terms(entry), entry.path, entry.mtime)
+
+    def remove(self, key):
+        """Remove a skill from the index. Returns True if it was indexed."""
+        document = self.documents.pop(key, None)
+        if document is None:
+            return False
+        path, _, length, terms = document
+        for term in terms:
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            posting.pop(key, None)
+            if not posting:
+                del self.postings[term]
+        if self.paths.get(path) == key:
+            del self.paths[path]
+        self.total_length -= length
+        return True
+
+    def remove_path(self, path):
+        """Remove the skill indexed from a .skill file."""
+        path = os.path.abspath(path)
+        self.duplicates.pop(path, None)
+        key = self.paths.get(path)
+        return self.remove(key) if key is not None else False
+
+    def refresh(self, skills_dir, ignore=()):
+        """
+        Bring the index up to date with a Skills directory.
+        Only files whose mtime changed are re-read, and skills whose file is gone are removed first, so a duplicate
+        of a removed skill takes its place. Files under the ignored directories are left out.
+        Returns (updated, removed) counts.
+        """
+        skills_dir = os.path.abspath(skills_dir)
+        skill_paths = [os.path.abspath(skill_path) for skill_path in iter_skill_files(skills_dir, ignore)]
+        seen = set(skill_paths)
+        removed = 0
+        for path in [path for path in self.paths if path not in seen]:
+            removed += self.remove(self.paths[path])
+        for path in [path for path in self.duplicates if path not in seen]:
+            del self.duplicates[path]
+        updated = 0
+        for skill_path in skill_paths:
+            key = self.paths.get(skill_path)
+            try:
+                mtime = os.stat(skill_path).st_mtime
+            except OSError:
+                continue
+            if key is not None and self.documents[key][1] == mtime:
+                continue
+            duplicate = self.duplicates.get(skill_path)
+            if duplicate is not None and duplicate[1] == mtime and duplicate[0] in self.documents:
+                continue
+            if key is not None:
+                self.remove(key)
+            try:
+                entry = index_skill_file(skill_path, skills_dir)
+            except (OSError, UnicodeDecodeError) as e:
+                print(f"Error indexing {skill_path}: {e}")
+                continue
+            if not self.add(entry):
+                print(f"Skipping {skill_path}: skill {entry.key} is already indexed from {self.documents[entry.key][0]}")
+                continue
+            updated += 1
+        return updated, removed
+
+    def search(self, query, k=5):
+        """Return the top k (skill key, score) pairs for a query, best first."""
+        if not self.documents:
+            return []
+        document_count = len(self.documents)
+        average_length = self.total_length / document_count or 1.0
+        k1 = self.k1
+        length_norm = k1 * (1 - self.b)
+        length_scale = k1 * self.b / average_length
+        scores = {}
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            df = len(posting)
+            idf = math.log(1 + (document_count - df + 0.5) / (df + 0.5))
+            for key, frequency in posting.items():
+                length = self.documents[key][2]
+                score = idf * frequency * (k1 + 1) / (frequency + length_norm + length_scale * length)
+                scores[key] = scores.get(key, 0.0) + score
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+    def to_dict(self):
+        return {'version': INDEX_VERSION, 'k1': self.k1, 'b': self.b, 'postings': self.postings, 'documents': self.documents,
+                'duplicates': self.duplicates}
+
+    def save(self, index_path):
+        """Save the index to a JSON file, replacing it atomically."""
+        temp_path = index_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, separators=(',', ':'))
+        os.replace(temp_path, index_path)
+
+    @classmethod
+    def load(cls, index_path):
+        """Load an index saved with save(). Returns an empty index if the file is missing or outdated."""
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls()
+        if data.get('version') != INDEX_VERSION:
+            return cls()
+        index = cls(data['k1'], data['b'])
+        index.postings = data['postings']
+        index.documents = data['documents']
+        index.duplicates = data['duplicates']
+        index.paths = {document[0]: key for key, document in index.documents.items() if document[0]}
+        index.total_length = sum(document[2] for document in index.documents.values())
+        return index
+
+    def __len__(self):
+        return len(self.documents)
+
+
+def build_index(skills_dir):
+    """Build a fresh index for a Skills directory."""
+    index = SkillIndex()
+    index.refresh(skills_dir)
+    return index
+
+def load_index(skills_dir, index_path=INDEX_FILE, ignore=()):
+    """Load the persisted index, refresh it against the Skills directory and save it if anything changed."""
+    with instrumentation.phase('read'):
+        index = SkillIndex.load(index_path)
+    duplicates = dict(index.duplicates)
+    with instrumentation.phase('index'):
+        updated, removed = index.refresh(skills_dir, ignore)
+    if updated or removed or index.duplicates != duplicates:
+        with instrumentation.phase('write'):
+            index.save(index_path)
+    return index
+
+def main():
+    parser = argparse.ArgumentParser(description="Search skills by their description, inputs and category.")
+    parser.add_argument("query", help="What the skill should do.")
+    parser.add_argument("--skills", required=True, help="Path to directory containing .skill files.")
+    parser.add_argument("--index", default=INDEX_FILE, help="File the search index is persisted to.")
+    parser.add_argument("-k", "--top", type=int, default=5, help="Number of skills to return.")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild the index from scratch.")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    instrumentation.setup(args)
+
+    if args.rebuild and os.path.isfile(args.index):
+        os.remove(args.index)
+    index = load_index(args.skills, args.index)
+    for key, score in index.search(args.query, args.top):
+        print(f"{score:.3f}  {key}")
+
+if __name__ == "__main__":
+    main()
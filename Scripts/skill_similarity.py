@@ -0,0 +1,205 @@
+#!/usr/bin/env python
+"""
+Find near-duplicate skills across the library.
+Prompts are turned into word n-gram shingles and MinHash signatures with NumPy, then locality sensitive
+hashing (LSH) groups skills whose signatures agree on a band, so only likely pairs are ever compared.
+Pairs above the similarity threshold are reported as clusters.
+"""
+import re
+import json
+import zlib
+import argparse
+
+import numpy as np
+
+from skill_registry import load_registry
+from skill_template import VARIABLE_PATTERN
+import instrumentation
+
+NUM_PERM = 128
+SHINGLE_SIZE = 3
+THRESHOLD = 0.5
+SEED = 1
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+WORD_PATTERN = re.compile(r'\w+|[^\w\s]')
+
+
+def get_prompt_words(prompt):
+    """Normalize a prompt into a list of lowercase words. Every {{$var}} becomes the same placeholder."""
+    return WORD_PATTERN.findall(VARIABLE_PATTERN.sub(' var ', prompt).lower())
+
+def get_shingles(words, shingle_size=SHINGLE_SIZE):
+    """Hash the word n-grams of a prompt into a unique uint64 array."""
+    if not words:
+        return np.zeros(0, dtype=np.uint64)
+    hashes = np.fromiter((zlib.crc32(word.encode('utf-8')) for word in words), dtype=np.uint64, count=len(words))
+    if len(hashes) < shingle_size:
+        shingle_size = len(hashes)
+    # Combine consecutive word hashes into one 32 bit value per n-gram with a rolling polynomial.
+    shingles = np.zeros(len(hashes) - shingle_size + 1, dtype=np.uint64)
+    for offset in range(shingle_size):
+        shingles = (shingles * np.uint64(1000003) + hashes[offset:len(hashes) - shingle_size + 1 + offset]) & MAX_HASH
+    return np.unique(shingles)
+
+def make_permutations(num_perm=NUM_PERM, seed=SEED):
+    """Random (a, b) coefficients for the universal hash functions that simulate permutations."""
+    generator = np.random.RandomState(seed)
+    a = generator.randint(1, 1 << 31, size=num_perm, dtype=np.uint64)
+    b = generator.randint(0, 1 << 31, size=num_perm, dtype=np.uint64)
+    return a, b
+
+def get_signature(shingles, permutations):
+    """MinHash signature of a shingle set: the minimum permuted hash for each permutation."""
+    a, b = permutations
+    if len(shingles) == 0:
+        return np.full(len(a), MAX_HASH, dtype=np.uint64)
+    permuted = ((shingles[None, :] * a[:, None] + b[:, None]) % MERSENNE_PRIME) & MAX_HASH
+    return permuted.min(axis=1)
+
+def get_signatures(prompts, num_perm=NUM_PERM, shingle_size=SHINGLE_SIZE, seed=SEED):
+    """Signature matrix with one row per prompt."""
+    permutations = make_permutations(num_perm, seed)
+    signatures = np.empty((len(prompts), num_perm), dtype=np.uint64)
+    for row, prompt in enumerate(prompts):
+        signatures[row] = get_signature(get_shingles(get_prompt_words(prompt), shingle_size), permutations)
+    return signatures
+
+def get_lsh_params(threshold, num_perm=NUM_PERM):
+    """
+    Choose (bands, rows) with bands * rows <= num_perm so that the LSH S-curve threshold (1/bands)^(1/rows)
+    sits just below the similarity threshold, favoring recall.
+    """
+    best = None
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        curve = (1.0 / bands) ** (1.0 / rows)
+        if curve > threshold:
+            continue
+        if best is None or curve > best[0]:
+            best = (curve, bands, rows)
+    if best is None:
+        return num_perm, 1
+    return best[1], best[2]
+
+def get_candidate_pairs(signatures, bands, rows):
+    """Pairs of rows (i < j) whose signatures are identical on at least one band."""
+    candidates = set()
+    for band in range(bands):
+        block = np.ascontiguousarray(signatures[:, band * rows:(band + 1) * rows])
+        keys = block.view(np.dtype((np.void, block.dtype.itemsize * rows))).ravel()
+        _, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+        inverse = inverse.ravel()
+        shared = np.flatnonzero(counts[inverse] > 1)
+        if len(shared) == 0:
+            continue
+        order = shared[np.argsort(inverse[shared], kind='stable')]
+        buckets = np.split(order, np.flatnonzero(np.diff(inverse[order])) + 1)
+        for bucket in buckets:
+            first, second = np.triu_indices(len(bucket), k=1)
+            candidates.update(zip(bucket[first].tolist(), bucket[second].tolist()))
+    if not candidates:
+        return np.zeros((0, 2), dtype=np.int64)
+    return np.array(sorted(candidates), dtype=np.int64)
+
+def estimate_similarity(signatures, pairs):
+    """Estimated Jaccard similarity for each pair: the fraction of signature positions that agree."""
+    if len(pairs) == 0:
+        return np.zeros(0)
+    return (signatures[pairs[:, 0]] == signatures[pairs[:, 1]]).mean(axis=1)
+
+def all_pairs_similarity(signatures, threshold, block_size=256):
+    """
+    Compare every pair of signatures in blocks instead of using LSH. Exact with respect to the signatures,
+    and still vectorized, but its cost grows with the square of the library size.
+    """
+    pairs = []
+    scores = []
+    for start in range(0, len(signatures), block_size):
+        block = signatures[start:start + block_size]
+        similarity = (block[:, None, :] == signatures[None, :, :]).mean(axis=2)
+        rows, columns = np.nonzero(similarity >= threshold)
+        rows = rows + start
+        keep = rows < columns
+        pairs.append(np.stack([rows[keep], columns[keep]], axis=1))
+        scores.append(similarity[rows[keep] - start, columns[keep]])
+    if not pairs:
+        return np.zeros((0, 2), dtype=np.int64), np.zeros(0)
+    return np.concatenate(pairs), np.concatenate(scores)
+
+def find_similar_pairs(signatures, threshold=THRESHOLD, use_lsh=True):
+    """Pairs of rows whose estimated similarity is at least the threshold, with their scores."""
+    if not use_lsh:
+        return all_pairs_similarity(signatures, threshold)
+    bands, rows = get_lsh_params(threshold, signatures.shape[1])
+    pairs = get_candidate_pairs(signatures, bands, rows)
+    scores = estimate_similarity(signatures, pairs)
+    keep = scores >= threshold
+    return pairs[keep], scores[keep]
+
+def get_clusters(count, pairs):
+    """Group rows connected by similar pairs. Returns a list of row lists, largest first, without singletons."""
+    parents = list(range(count))
+
+    def find(row):
+        while parents[row] != row:
+            parents[row] = parents[parents[row]]
+            row = parents[row]
+        return row
+
+    for i, j in pairs:
+        root_i, root_j = find(int(i)), find(int(j))
+        if root_i != root_j:
+            parents[max(root_i, root_j)] = min(root_i, root_j)
+    groups = {}
+    for row in range(count):
+        groups.setdefault(find(row), []).append(row)
+    return sorted((group for group in groups.values() if len(group) > 1), key=len, reverse=True)
+
+def find_duplicate_skills(registry, threshold=THRESHOLD, num_perm=NUM_PERM, shingle_size=SHINGLE_SIZE, use_lsh=True):
+    """Find clusters of similar skills in a registry. Returns a report dict."""
+    entries = list(registry)
+    with instrumentation.phase('read'):
+        prompts = [entry.read_prompt() for entry in entries]
+    with instrumentation.phase('minhash'):
+        signatures = get_signatures(prompts, num_perm, shingle_size)
+    with instrumentation.phase('candidates'):
+        pairs, scores = find_similar_pairs(signatures, threshold, use_lsh)
+    clusters = get_clusters(len(entries), pairs)
+    return {
+        'threshold': threshold,
+        'num_perm': num_perm,
+        'shingle_size': shingle_size,
+        'skills': len(entries),
+        'pairs': [
+            {'a': entries[i].key, 'b': entries[j].key, 'similarity': round(float(score), 3)}
+            for (i, j), score in sorted(zip(pairs.tolist(), scores.tolist()), key=lambda item: -item[1])
+        ],
+        'clusters': [[entries[row].key for row in cluster] for cluster in clusters],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Find near-duplicate skills with MinHash and LSH.")
+    parser.add_argument("--skills", required=True, help="Path to directory containing .skill files.")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="Minimum estimated Jaccard similarity of prompt shingles.")
+    parser.add_argument("--num_perm", type=int, default=NUM_PERM, help="Number of MinHash permutations.")
+    parser.add_argument("--shingle_size", type=int, default=SHINGLE_SIZE, help="Number of words per shingle.")
+    parser.add_argument("--all_pairs", action="store_true", help="Compare every pair of signatures instead of using LSH.")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    instrumentation.setup(args)
+
+    registry = load_registry(args.skills)
+    report = find_duplicate_skills(registry, args.threshold, args.num_perm, args.shingle_size, not args.all_pairs)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    for pair in report['pairs']:
+        print(f"{pair['similarity']:.3f}  {pair['a']}  {pair['b']}")
+    for number, cluster in enumerate(report['clusters'], 1):
+        print(f"Cluster {number}: {', '.join(cluster)}")
+    print(f"\n{len(report['clusters'])} clusters among {report['skills']} skills.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+"""
+Streaming execution of a single skill.
+The completion is yielded piece by piece as it arrives and passed through a StopMatcher built from the skill's
+settings.stop, so a stop sequence split across chunks is still caught. As soon as one matches, the connection
+is closed, which cancels the request upstream instead of paying for tokens that would be thrown away.
+"""
+import sys
+import json
+import time
+import argparse
+
+from skill_registry import load_registry
+from skill_template import SkillRenderer
+from skill_client import SkillClient, CompletionError
+from stop_matcher import StopMatcher, get_stop_sequences
+import instrumentation
+
+
+class SkillStream:
+    """
+    Iterator over the text of a streamed completion, cut at the first stop sequence.
+    After iteration, stopped tells whether a stop sequence ended it and first_token_time holds the seconds
+    until the first text was released.
+    """
+
+    def __init__(self, client, prompt, settings=None, model=None):
+        self.matcher = StopMatcher(get_stop_sequences(settings))
+        self.chunks = client.stream(prompt, settings, model)
+        self.stopped = False
+        self.started = time.perf_counter()
+        self.first_token_time = None
+
+    def __iter__(self):
+        try:
+            for chunk in self.chunks:
+                emit, stopped = self.matcher.feed(chunk)
+                if emit:
+                    if self.first_token_time is None:
+                        self.first_token_time = time.perf_counter() - self.started
+                        instrumentation.METRICS.observe('first_token', self.first_token_time)
+                    yield emit
+                if stopped:
+                    self.stopped = True
+                    return
+            tail = self.matcher.flush()
+            if tail:
+                yield tail
+        finally:
+            # Closing the upstream generator drops the connection if the server is still sending.
+            self.chunks.close()
+
+    def text(self):
+        """Consume the stream and return the whole completion."""
+        return ''.join(self)
+
+def stream_skill(client, registry, key, values=None, model=None, renderer=None):
+    """Render a skill with values and start streaming its completion. Returns a SkillStream."""
+    renderer = renderer or SkillRenderer(registry)
+    prompt = renderer.render(key, values or {})
+    return SkillStream(client, prompt, registry.get(key).settings, model)
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream the completion of a skill to standard output.")
+    parser.add_argument("--skills", required=True, help="Path to directory containing .skill files.")
+    parser.add_argument("--skill", required=True, help="Dotted key of the skill (e.g. Chat.chat).")
+    parser.add_argument("--inputs", help="JSON object of input values. Defaults from the skill are used for missing inputs.")
+    parser.add_argument("--model", default=None, help="Override the model from the skill's settings.")
+    parser.add_argument("--api_base", default=None, help="API base URL. Defaults to OPENAI_API_BASE.")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    instrumentation.setup(args)
+
+    registry = load_registry(args.skills)
+    if args.skill not in registry:
+        print(f"Skill {args.skill} not found.")
+        sys.exit(1)
+    with SkillClient(args.api_base) as client:
+        stream = stream_skill(client, registry, args.skill, json.loads(args.inputs) if args.inputs else {}, args.model)
+        try:
+            for text in stream:
+                sys.stdout.write(text)
+                sys.stdout.flush()
+        except CompletionError as e:
+            print(f"\nError: {e}")
+            sys.exit(1)
+    sys.stdout.write('\n')
+    if stream.first_token_time is not None:
+        print(f"First token after {stream.first_token_time * 1000:.0f}ms{', stopped at a stop sequence' if stream.stopped else ''}.",
+              file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+"""
+Precompiled renderer for the {{$var}} syntax used in .skill prompts.
+Each prompt is compiled once into static and variable segments so rendering is a single join,
+no matter how many times a template references the same variable.
+"""
+import re
+import sys
+import json
+import argparse
+
+from skill_registry import load_registry
+import instrumentation
+
+VARIABLE_PATTERN = re.compile(r'\{\{\$(.*?)\}\}')
+
+
+class CompiledTemplate:
+    """
+    A prompt split into static text and {{$var}} slots.
+    statics always has one more item than variables: the text before, between and after each slot.
+    """
+    __slots__ = ('statics', 'variables', 'defaults', 'parts', 'slots')
+
+    def __init__(self, statics, variables, defaults=None):
+        self.statics = statics
+        self.variables = variables
+        self.defaults = dict(defaults or {})
+        # parts holds the static text with a placeholder at every variable position.
+        self.parts = [statics[0]]
+        positions = {}
+        for variable, static in zip(variables, statics[1:]):
+            positions.setdefault(variable, []).append(len(self.parts))
+            self.parts.append('')
+            self.parts.append(static)
+        self.slots = tuple((name, tuple(indexes)) for name, indexes in positions.items())
+
+    @property
+    def variable_names(self):
+        """Unique variable names in order of first appearance."""
+        return [name for name, _ in self.slots]
+
+    def render(self, values=None):
+        """Render the template. Variables missing from values fall back to the input defaults, then to ""."""
+        values = values or {}
+        defaults = self.defaults
+        parts = list(self.parts)
+        for name, indexes in self.slots:
+            value = values[name] if name in values else defaults.get(name, '')
+            value = value if isinstance(value, str) else str(value)
+            for index in indexes:
+                parts[index] = value
+        return ''.join(parts)
+
+    def render_batch(self, rows):
+        """Render the template once for every dict of values in rows."""
+        slots = self.slots
+        base = list(self.parts)
+        for name, indexes in slots:
+            value = self.defaults.get(name, '')
+            value = value if isinstance(value, str) else str(value)
+            for index in indexes:
+                base[index] = value
+        rendered = []
+        for values in rows:
+            parts = list(base)
+            for name, indexes in slots:
+                if name not in values:
+                    continue
+                value = values[name]
+                value = value if isinstance(value, str) else str(value)
+                for index in indexes:
+                    parts[index] = value
+            rendered.append(''.join(parts))
+        return rendered
+
+    def __repr__(self):
+        return f"CompiledTemplate(variables={self.variable_names!r})"
+
+
+def compile_template(prompt, defaults=None):
+    """Compile a prompt into a CompiledTemplate."""
+    statics = []
+    variables = []
+    position = 0
+    for match in VARIABLE_PATTERN.finditer(prompt):
+        statics.append(prompt[position:match.start()])
+        variables.append(match.group(1))
+        position = match.end()
+    statics.append(prompt[position:])
+    return CompiledTemplate(statics, variables, defaults)
+
+
+def compile_skill(entry):
+    """Compile the prompt of a registry entry, using its inputs for defaults."""
+    return compile_template(entry.read_prompt(), entry.input_defaults)
+
+
+class SkillRenderer:
+    """Renders skills from a SkillRegistry, compiling each prompt on first use."""
+
+    def __init__(self, registry):
+        self.registry = registry
+        self.templates = {}
+
+    def get_template(self, key):
+        """Get the compiled template for a skill, compiling it if needed."""
+        template = self.templates.get(key)
+        if template is None:
+            template = compile_skill(self.registry.get(key))
+            self.templates[key] = template
+        return template
+
+    def invalidate(self, key=None):
+        """Forget compiled templates, either for one skill or all of them."""
+        if key is None:
+            self.templates.clear()
+        else:
+            self.templates.pop(key, None)
+
+    def render(self, key, values=None):
+        """Render a skill with the given input values."""
+        return self.get_template(key).render(values)
+
+    def render_batch(self, key, rows):
+        """Render a skill over a list of input dicts."""
+        with instrumentation.phase('render'):
+            return self.get_template(key).render_batch(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render a .skill prompt with input values.")
+    parser.add_argument("--skills", required=True, help="Path to directory containing .skill files.")
+    parser.add_argument("--skill", required=True, help="Dotted key of the skill to render (e.g. Chat.chat).")
+    parser.add_argument("--inputs", help="JSON object of input values. Defaults from the skill are used for missing inputs.")
+    parser.add_argument("--batch", help="JSONL file with one object of input values per line. Rendered prompts are written as JSONL.")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    instrumentation.setup(args)
+
+    registry = load_registry(args.skills)
+    if args.skill not in registry:
+        print(f"Skill {args.skill} not found.")
+        return
+    renderer = SkillRenderer(registry)
+
+    if args.batch:
+        with open(args.batch, 'r', encoding='utf-8') as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+        for prompt in renderer.render_batch(args.skill, rows):
+            sys.stdout.write(json.dumps({"prompt": prompt}) + "\n")
+    else:
+        values = json.loads(args.inputs) if args.inputs else {}
+        sys.stdout.write(renderer.render(args.skill, values))
+
+if __name__ == "__main__":
+    main()
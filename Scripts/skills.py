@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+"""
+Single entry point for the Skills scripts: python Scripts/skills.py <command> [options].
+Only the module of the chosen command is imported, and heavy dependencies (tiktoken, openai, ruamel.yaml,
+dotenv, toml, numpy) are imported by the code paths that need them, so short invocations from hooks start fast.
+Each command takes the same options as running its script directly, e.g. `skills.py validate --skills Skills`.
+"""
+import sys
+import runpy
+
+# Command name to (module, description). Kept as plain strings so listing the commands imports nothing.
+COMMANDS = {
+    'validate': ('validate_skills', "Validate every .skill file in a Skills directory."),
+    'fix': ('fix_skill_inputs', "Fix input variable names in .skill files."),
+    'convert': ('convert_to_skill_format', "Convert legacy skill folders to .skill files."),
+    'list': ('skill_registry', "Index .skill files and optionally print a skill's prompt."),
+    'render': ('skill_template', "Render a .skill prompt with input values."),
+    'tokens': ('token_counter', "Count the tokens of every prompt in a directory."),
+    'cost': ('prompt_cost', "Estimate the token cost of a rendered skill."),
+    'history': ('chat_history', "Trim a chat transcript to fit a chat skill."),
+    'prefixes': ('prefix_analysis', "Report prompt prefixes shared between skills, or order requests by prefix."),
+    'search': ('skill_search', "Search skills by description, inputs and category."),
+    'similar': ('skill_similarity', "Find near-duplicate skills."),
+    'bundle': ('skill_bundle', "Pack a Skills directory into a bundle, or inspect one."),
+    'watch': ('watch_skills', "Rebuild derived skill artifacts, optionally watching for changes."),
+    'describe': ('generate_description_file', "Generate description files for legacy skills."),
+    'complete': ('skill_client', "Send one prompt to a completion endpoint."),
+    'run': ('skill_runner', "Run a skill over every row of a JSONL file."),
+    'stream': ('skill_stream', "Stream the completion of a skill."),
+    'pipeline': ('skill_pipeline', "Run a plan of chained skills."),
+    'cache': ('result_cache', "Inspect or clear the skill result cache."),
+    'stop': ('stop_matcher', "Cut standard input at the first stop sequence."),
+    'stub_server': ('stub_model_server', "Run a local stub completion server."),
+    'generate': ('generate_synthetic_skills', "Generate a synthetic Skills tree."),
+    'benchmark': ('benchmark_scripts', "Benchmark the scripts on synthetic trees."),
+    'metrics': ('instrumentation', "Print the summary of a saved metrics file."),
+}
+
+
+def print_usage(file=sys.stdout):
+    print("usage: skills.py <command> [options]\n\ncommands:", file=file)
+    for name, (_, description) in COMMANDS.items():
+        print(f"  {name:<12} {description}", file=file)
+    print("\nRun skills.py <command> --help for the options of a command.", file=file)
+
+def run_command(name, args):
+    """Run a command's module as __main__ with args as its command line."""
+    module = COMMANDS[name][0]
+    sys.argv = [module + '.py'] + list(args)
+    # alter_sys makes the module the real __main__ for the run, so worker processes can find its functions.
+    runpy.run_module(module, run_name='__main__', alter_sys=True)
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ('-h', '--help'):
+        print_usage()
+        return
+    if argv[0] not in COMMANDS:
+        print(f"Unknown command {argv[0]}.\n", file=sys.stderr)
+        print_usage(sys.stderr)
+        sys.exit(2)
+    run_command(argv[0], argv[1:])
+
+if __name__ == "__main__":
+    main()
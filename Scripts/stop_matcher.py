@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+"""
+Incremental stop sequence detection for streamed completions.
+StopMatcher is an Aho-Corasick automaton over all of a skill's stop sequences. Text is fed in chunks as it
+arrives and every character is visited once, so matches that span chunk boundaries are found without
+re-scanning the accumulated text. Only the trailing characters that could still be the start of a stop
+sequence are held back; everything before them is released immediately.
+"""
+import sys
+import argparse
+
+import instrumentation
+
+
+def get_stop_sequences(settings):
+    """Normalize a skill's stop setting (a string or a list of strings) to a list of non-empty strings."""
+    stop = (settings or {}).get('stop')
+    if stop is None:
+        return []
+    if isinstance(stop, str):
+        stop = [stop]
+    return [str(sequence) for sequence in stop if str(sequence)]
+
+
+class StopMatcher:
+    """
+    Aho-Corasick matcher over a set of stop sequences.
+    feed() returns the text that is safe to emit and whether a stop sequence matched.
+    Once a stop has matched, the text from the start of the stop onwards is dropped.
+    """
+
+    def __init__(self, stops):
+        self.stops = [stop for stop in stops if stop]
+        # State 0 is the root. goto[state] maps a character to the next state, depth[state] is the length of
+        # the prefix the state stands for and match[state] is the length of the longest stop ending there.
+        self.goto = [{}]
+        self.fail = [0]
+        self.depth = [0]
+        self.match = [0]
+        for stop in self.stops:
+            state = 0
+            for char in stop:
+                next_state = self.goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][char] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.depth.append(self.depth[state] + 1)
+                    self.match.append(0)
+                state = next_state
+            self.match[state] = max(self.match[state], len(stop))
+        self.build_failure_links()
+        self.reset()
+
+    def build_failure_links(self):
+        """Breadth-first pass that links each state to its longest proper suffix in the trie."""
+        queue = list(self.goto[0].values())
+        position = 0
+        while position < len(queue):
+            state = queue[position]
+            position += 1
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[next_state] = target if target != next_state else 0
+                if not self.match[next_state]:
+                    # A stop that is a suffix of this prefix also ends here.
+                    self.match[next_state] = self.match[self.fail[next_state]]
+
+    def reset(self):
+        """Start matching a new stream."""
+        self.state = 0
+        self.held = ''
+        self.stopped = False
+
+    def feed(self, text):
+        """
+        Consume the next chunk of a stream. Returns (emit, stopped): the text that can be released now and
+        whether a stop sequence has matched. After a match, further input is ignored.
+        """
+        if self.stopped:
+            return '', True
+        goto = self.goto
+        fail = self.fail
+        match = self.match
+        state = self.state
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if match[state]:
+                self.stopped = True
+                self.state = 0
+                pending = self.held + text[:position + 1]
+                self.held = ''
+                return pending[:len(pending) - match[state]], True
+        self.state = state
+        pending = self.held + text
+        keep = self.depth[state]
+        self.held = pending[len(pending) - keep:] if keep else ''
+        return pending[:len(pending) - keep], False
+
+    def flush(self):
+        """Release the held-back text at the end of a stream that did not stop."""
+        held = self.held
+        self.held = ''
+        self.state = 0
+        return '' if self.stopped else held
+
+def truncate_at_stop(text, stops):
+    """Cut a complete text at the first stop sequence, the same way the streaming matcher would."""
+    emit, stopped = StopMatcher(stops).feed(text)
+    return emit if stopped else text
+
+def main():
+    parser = argparse.ArgumentParser(description="Cut standard input at the first of the given stop sequences.")
+    parser.add_argument("stops", nargs='+', help="Stop sequences.")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    instrumentation.setup(args)
+
+    sys.stdout.write(truncate_at_stop(sys.stdin.read(), args.stops))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+"""
+Local stub of an OpenAI-compatible /v1/completions endpoint for running skills offline.
+Each completion echoes the start of the prompt, so results are deterministic. The server can add latency
+and fail a share of requests with 503 to exercise retries. Requests with "stream": true are answered with
+server-sent events, one small chunk at a time, and stop early when the client disconnects.
+Stop sequences are deliberately ignored so that client-side stop detection can be tested.
+Point the scripts at it with OPENAI_API_BASE=http://127.0.0.1:<port>/v1.
+"""
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import instrumentation
+
+DEFAULT_PORT = 8765
+ECHO_CHARS = 40
+STREAM_CHUNK_CHARS = 4
+
+
+def make_completion(prompt, max_tokens=None, echo_chars=ECHO_CHARS):
+    """Deterministic completion text for a prompt."""
+    text = f"Completion for: {' '.join(prompt.split())[:echo_chars]}"
+    if max_tokens is not None:
+        text = ' '.join(text.split(' ')[:max(1, int(max_tokens))])
+    return text
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def send_json(self, status, payload):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_event(self, payload):
+        """Write one server-sent event as an HTTP chunk."""
+        data = f"data: {payload}\n\n".encode('utf-8')
+        self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+
+    def send_stream(self, text, model):
+        server = self.server
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        try:
+            for start in range(0, len(text), STREAM_CHUNK_CHARS):
+                if server.chunk_delay:
+                    time.sleep(server.chunk_delay)
+                self.send_event(json.dumps({
+                    'object': 'text_completion',
+                    'model': model,
+                    'choices': [{'text': text[start:start + STREAM_CHUNK_CHARS], 'index': 0, 'finish_reason': None}],
+                }))
+                with server.lock:
+                    server.chunks_sent += 1
+            self.send_event('[DONE]')
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            with server.lock:
+                server.streams_cancelled += 1
+            self.close_connection = True
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            body = json.loads(self.rfile.read(length))
+        except ValueError:
+            self.send_json(400, {'error': {'message': 'Invalid JSON', 'type': 'invalid_request_error'}})
+            return
+        if not self.path.endswith('/completions') or not isinstance(body.get('prompt'), str):
+            self.send_json(404, {'error': {'message': 'Unknown endpoint', 'type': 'invalid_request_error'}})
+            return
+        server = self.server
+        with server.lock:
+            server.requests += 1
+        if server.delay:
+            time.sleep(server.delay)
+        if server.fail_rate and random.random() < server.fail_rate:
+            self.send_json(503, {'error': {'message': 'Stub server is busy', 'type': 'server_error'}})
+            return
+        text = make_completion(body['prompt'], body.get('max_tokens'), server.echo_chars)
+        if body.get('stream'):
+            self.send_stream(text, body.get('model'))
+            return
+        self.send_json(200, {
+            'id': f"stub-{server.requests}",
+            'object': 'text_completion',
+            'model': body.get('model'),
+            'choices': [{'text': text, 'index': 0, 'finish_reason': 'stop'}],
+        })
+
+
+def make_server(port=DEFAULT_PORT, delay=0.0, fail_rate=0.0, echo_chars=ECHO_CHARS, chunk_delay=0.0, host='127.0.0.1'):
+    """Create (but do not start) a stub server. Call serve_forever() on the result, e.g. in a thread."""
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    server.daemon_threads = True
+    server.delay = delay
+    server.fail_rate = fail_rate
+    server.echo_chars = echo_chars
+    server.chunk_delay = chunk_delay
+    server.requests = 0
+    server.chunks_sent = 0
+    server.streams_cancelled = 0
+    server.lock = threading.Lock()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local stub completion server.")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port to listen on.")
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds to wait before answering each request.")
+    parser.add_argument("--fail_rate", type=float, default=0.0, help="Share of requests answered with HTTP 503.")
+    parser.add_argument("--echo_chars", type=int, default=ECHO_CHARS, help="Characters of the prompt echoed in each completion.")
+    parser.add_argument("--chunk_delay", type=float, default=0.0, help="Seconds between streamed chunks.")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    instrumentation.setup(args)
+
+    server = make_server(args.port, args.delay, args.fail_rate, args.echo_chars, args.chunk_delay)
+    print(f"Stub completion server listening on http://127.0.0.1:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopped.")
+
+if __name__ == "__main__":
+    main()
@@ -1,63 +1,213 @@
-"""A script to count the number of tokens in the entire repo."""
-import tiktoken, os, sys
+"""
+A script to count the number of tokens in the entire repo.
+Counts legacy skprompt.txt templates and the prompt block of .skill files, tokenizing across a process pool.
+Counts are cached on disk by content hash so unchanged prompts are not re-tokenized.
+tiktoken and the process pool are only imported when they are needed, and the tokenizer is loaded once per process.
+"""
+import os, sys
 import argparse
+import hashlib
+import json
+
+from skill_registry import SKILL_EXTENSION, index_skill_file, get_category_from_path
+import instrumentation
+from instrumentation import phase
 
 TOKEN_BATCH_SIZE = 1000
 TOKEN_PRICE = 0.03
-token_encodings = tiktoken.encoding_for_model("gpt-4")
+TOKEN_MODEL = "gpt-4"
+TOKEN_CACHE_FILE = ".token_cache.json"
+PROMPTS_PER_TASK = 64
+token_encodings = None
+model_encodings = {}
+
+
+def get_token_encodings():
+    """Load the tokenizer for TOKEN_MODEL once per process."""
+    global token_encodings
+    if token_encodings is None:
+        with phase('load_tokenizer'):
+            import tiktoken
+            token_encodings = tiktoken.encoding_for_model(TOKEN_MODEL)
+    return token_encodings
 
+def get_model_encodings(model):
+    """Load the tokenizer of a model once per process, using TOKEN_MODEL's for models tiktoken does not know."""
+    if not model or model == TOKEN_MODEL:
+        return get_token_encodings()
+    encodings = model_encodings.get(model)
+    if encodings is None:
+        with phase('load_tokenizer'):
+            import tiktoken
+            try:
+                encodings = tiktoken.encoding_for_model(str(model))
+            except KeyError:
+                encodings = get_token_encodings()
+        model_encodings[model] = encodings
+    return encodings
 
 def get_skprompt_template(directory):
     """Get the skprompt.txt file from the folder and return it as a string."""
     with open(directory + '/skprompt.txt', 'r') as f:
         return f.read()
-    
+
 def get_token_count(template):
     """Get the token count from the template."""
-    return len(token_encodings.decode(token_encodings.encode(template)))
+    return len(get_token_encodings().encode_ordinary(template))
+
+def get_token_counts(templates):
+    """Get the token count of every template in a list. Used as a unit of work for the process pool."""
+    encodings = get_token_encodings()
+    return [len(tokens) for tokens in encodings.encode_ordinary_batch(templates, num_threads=1)]
+
+def get_prompt_hash(template):
+    """Hash a template so its token count can be cached."""
+    return hashlib.sha256(template.encode('utf-8')).hexdigest()
+
+def load_token_cache(cache_path):
+    """Load cached token counts for TOKEN_MODEL from disk."""
+    if not cache_path or not os.path.isfile(cache_path):
+        return {}
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable token cache {cache_path}: {e}")
+        return {}
+    if cache.get('model') != TOKEN_MODEL:
+        return {}
+    return cache.get('counts', {})
+
+def save_token_cache(cache_path, counts):
+    """Save token counts to disk, replacing the file atomically."""
+    temp_path = cache_path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump({'model': TOKEN_MODEL, 'counts': counts}, f)
+    os.replace(temp_path, cache_path)
+
+def find_prompt_files(directory):
+    """
+    Find every prompt under the directory.
+    Yields (path, category) for each skprompt.txt template folder and each .skill file.
+    """
+    directory = os.path.abspath(directory)
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        if '.git' in dirs:
+            dirs.remove('.git')
+        if 'skprompt.txt' in files:
+            yield os.path.join(root, 'skprompt.txt'), get_category_from_path(root, directory)
+        for file in sorted(files):
+            if file.endswith(SKILL_EXTENSION):
+                path = os.path.join(root, file)
+                yield path, get_category_from_path(path, directory)
 
-def search_directory(directory, depth=0):
-    """From the directory, loop through every folder and subfolder and count the tokens of the skpompt template."""
-    print(f'Searching directory at depth {depth}: ' + directory.split('/')[-1])
+def read_prompt(path):
+    """Read the prompt text of a skprompt.txt template or the skill: | block of a .skill file."""
+    if path.endswith(SKILL_EXTENSION):
+        return index_skill_file(path, os.path.dirname(path)).read_prompt()
+    return get_skprompt_template(os.path.dirname(path))
+
+def count_templates(templates, workers=None):
+    """Count tokens for a list of templates, spreading batches across a process pool."""
+    batches = [templates[i:i + PROMPTS_PER_TASK] for i in range(0, len(templates), PROMPTS_PER_TASK)]
+    if workers == 1 or len(batches) <= 1:
+        return [count for batch in batches for count in get_token_counts(batch)]
+    # Imported here because prompt_cost and chat_history use this module for its tokenizer only.
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return [count for counts in executor.map(get_token_counts, batches) for count in counts]
+
+def count_directory(directory, workers=None, cache_path=None, token_batch_size=TOKEN_BATCH_SIZE, token_price=TOKEN_PRICE):
+    """Count the tokens of every prompt under the directory and return a per-file and per-category report."""
+    cache = load_token_cache(cache_path)
+    files = []
+    uncached = {}
+    with phase('walk'):
+        prompt_files = list(find_prompt_files(directory))
+    for path, category in prompt_files:
+        try:
+            with phase('read'):
+                template = read_prompt(path)
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"Error reading {path}: {e}")
+            continue
+        prompt_hash = get_prompt_hash(template)
+        files.append({'path': os.path.relpath(path, directory), 'category': category, 'hash': prompt_hash})
+        if prompt_hash not in cache:
+            uncached[prompt_hash] = template
+
+    hashes = list(uncached)
+    with phase('tokenize'):
+        counts = count_templates([uncached[prompt_hash] for prompt_hash in hashes], workers)
+    cache.update(zip(hashes, counts))
+    if cache_path and hashes:
+        with phase('write'):
+            save_token_cache(cache_path, cache)
+    instrumentation.count('prompts', len(files))
+    instrumentation.count('prompts_tokenized', len(hashes))
+
+    categories = {}
     token_count = 0
+    for file in files:
+        prompt_hash = file.pop('hash')
+        file['tokens'] = cache[prompt_hash]
+        file['cached'] = prompt_hash not in uncached
+        token_count += file['tokens']
+        category = categories.setdefault(file['category'], {'files': 0, 'tokens': 0})
+        category['files'] += 1
+        category['tokens'] += file['tokens']
 
-    #Get all repo items
-    items = os.listdir(directory)
-    #Remove the .git folder from the list of items if it exists
-    if '.git' in items:
-        items.remove('.git')
-    #Make sure each item is a folder
-    folders = [item for item in items if os.path.isdir(os.path.join(directory, item))]
-
-
-    for folder in folders:
-        """
-        Check to see if this folder has a skprompt.txt file in it. If not, then it has more skills folders in it.
-        We'll need to search through those folders as well.
-        """
-        folder_path = os.path.join(directory, folder)
-        if 'skprompt.txt' not in os.listdir(folder_path):
-            token_count += search_directory(folder_path, depth=depth+1)
-        else:
-            print(f'Searching directory at depth {depth+1}: ' + folder_path.split('/')[-1])
-            template = get_skprompt_template(folder_path)
-            token_count += get_token_count(template)
-
-    return token_count
-
-def main(directory):
+    return {
+        'directory': os.path.abspath(directory),
+        'model': TOKEN_MODEL,
+        'total_tokens': token_count,
+        'token_batch_size': token_batch_size,
+        'token_price': token_price,
+        'estimated_price': get_estimated_price(token_count, token_batch_size, token_price),
+        'tokenized': len(hashes),
+        'categories': categories,
+        'files': files,
+    }
+
+def get_estimated_price(token_count, token_batch_size=TOKEN_BATCH_SIZE, token_price=TOKEN_PRICE):
+    """Price of the tokens given the price per batch of tokens."""
+    return round(float(token_count / token_batch_size * token_price), 2)
+
+def search_directory(directory, depth=0, workers=None, cache_path=None):
+    """From the directory, count the tokens of every skprompt template and .skill prompt."""
+    print(f'Searching directory at depth {depth}: ' + os.path.basename(os.path.normpath(directory)))
+    return count_directory(directory, workers, cache_path)['total_tokens']
+
+def main(directory, token_batch_size=TOKEN_BATCH_SIZE, token_price=TOKEN_PRICE, workers=None, cache_path=TOKEN_CACHE_FILE, json_path=None):
     """Main function."""
-    token_count = search_directory(directory)
-    print('Total tokens: ' + str(token_count))
+    report = count_directory(directory, workers, cache_path, token_batch_size, token_price)
+
+    if json_path == '-':
+        print(json.dumps(report, indent=2))
+        return report
+    if json_path:
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
 
-    estimated_price = round(float(token_count/TOKEN_BATCH_SIZE*TOKEN_PRICE), 2)
-    print('Estimated price: $' + str(estimated_price))
+    for category, totals in sorted(report['categories'].items()):
+        print(f"{category or '.'}: {totals['tokens']} tokens in {totals['files']} files")
+    print(f"Prompts tokenized: {report['tokenized']} of {len(report['files'])}")
+    print('Total tokens: ' + str(report['total_tokens']))
+    print('Estimated price: $' + str(report['estimated_price']))
+    return report
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Count the number of tokens in a repo.')
     parser.add_argument('directory', type=str, help='The directory to search.')
     parser.add_argument('--batch_size', type=int, help='The batch size of the model.', default=TOKEN_BATCH_SIZE)
     parser.add_argument('--token_price', type=float, help='The price per token batch size.', default=TOKEN_PRICE)
+    parser.add_argument('--workers', type=int, help='Number of processes used for tokenizing. Defaults to the CPU count.', default=None)
+    parser.add_argument('--cache', type=str, help='File used to cache token counts by content hash.', default=TOKEN_CACHE_FILE)
+    parser.add_argument('--no_cache', action='store_true', help='Do not read or write the token cache.')
+    parser.add_argument('--json', type=str, help='Write the per-file and per-category report as JSON to this file, or - for stdout.', default=None)
+    instrumentation.add_arguments(parser)
     args = parser.parse_args()
+    instrumentation.setup(args)
 
-    main(args.directory)
+    main(args.directory, args.batch_size, args.token_price, args.workers, None if args.no_cache else args.cache, args.json)
@@ -0,0 +1,330 @@
+#!/usr/bin/env python
+"""
+Validate every .skill file under a Skills directory in one parallel pass.
+Checks that:
+  - the required fields are present and no top-level key appears twice
+  - every {{$var}} in the prompt is well-formed and has an input of exactly the same name (see fix_skill_inputs.py)
+  - function-call blocks such as {{recall $input}} are well-formed and their $var arguments have inputs; the calls
+    themselves are only warned about, since rendering leaves them for the kernel to run
+  - inputs have a unique, valid name, a type and a description, and required is a boolean
+  - the model settings have the right types and ranges
+  - stop sequences are non-empty strings
+  - no two skills share a dotted key
+Results are cached by content hash in .validate_cache.json, so re-validating a tree where one file changed only
+checks that file. Exits with status 1 if any errors (or, with --strict, warnings) were found.
+"""
+import os
+import re
+import sys
+import json
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from skill_registry import (PROMPT_KEY, iter_skill_files, split_sections, parse_scalar,
+                            parse_inputs, parse_settings, dedent_block, get_category_from_path)
+from skill_template import VARIABLE_PATTERN
+from fix_skill_inputs import normalize_var_name
+import instrumentation
+from instrumentation import phase
+
+VALIDATE_CACHE_FILE = ".validate_cache.json"
+# Bump when the checks change so cached results are not reused.
+VALIDATOR_VERSION = 2
+FILES_PER_TASK = 64
+REQUIRED_FIELDS = ('name', 'description', PROMPT_KEY)
+KNOWN_FIELDS = REQUIRED_FIELDS + ('skill_class', 'inputs', 'settings')
+SKILL_CLASSES = ('semantic', 'native')
+INPUT_FIELDS = ('name', 'type', 'description')
+# Setting name to (allowed types, minimum, maximum).
+NUMERIC_SETTINGS = {
+    'max_tokens': ((int,), 1, None),
+    'temperature': ((int, float), 0, 2),
+    'top_p': ((int, float), 0, 1),
+    'presence_penalty': ((int, float), -2, 2),
+    'frequency_penalty': ((int, float), -2, 2),
+}
+BOOLEAN_SETTINGS = ('stream', 'echo')
+MAX_STOP_SEQUENCES = 4
+VARIABLE_NAME_PATTERN = re.compile(r'^[A-Za-z_]\w*$')
+BLOCK_PATTERN = re.compile(r'\{\{(.*?)\}\}')
+# A Semantic Kernel function call: a dotted function name followed by arguments, e.g. {{recall $input}}.
+FUNCTION_CALL_PATTERN = re.compile(r'^[A-Za-z_][\w.]*(\s+\S+)*$')
+ERROR = 'error'
+WARNING = 'warning'
+
+
+def check_prompt(prompt, input_names):
+    """Check the {{$var}} references and function-call blocks of a prompt against the input names."""
+    issues = []
+    if not prompt.strip():
+        return [(ERROR, "The skill prompt is empty.")]
+    variables = []
+    calls = []
+    blocks = BLOCK_PATTERN.findall(prompt)
+    for block in blocks:
+        if block.startswith('$'):
+            names = [block[1:]]
+        elif FUNCTION_CALL_PATTERN.match(block.strip()):
+            if block.strip() not in calls:
+                calls.append(block.strip())
+            # Arguments are $var references, quoted values or name=value pairs.
+            names = [argument.split('=', 1)[-1][1:] for argument in block.split()[1:]
+                     if argument.split('=', 1)[-1].startswith('$')]
+        else:
+            issues.append((ERROR, f"Malformed block {{{{{block}}}}}."))
+            continue
+        for var in names:
+            if var not in variables:
+                variables.append(var)
+    if prompt.count('{{') != len(blocks):
+        issues.append((ERROR, "The prompt has a {{ that is not closed by }}."))
+    for call in calls:
+        issues.append((WARNING, f"Function call {{{{{call}}}}} is left as is when the prompt is rendered."))
+    normalized = None
+    for var in variables:
+        if not VARIABLE_NAME_PATTERN.match(var):
+            issues.append((ERROR, f"Malformed variable {{{{${var}}}}}."))
+        elif var not in input_names:
+            if normalized is None:
+                normalized = {normalize_var_name(name): name for name in input_names}
+            match = normalized.get(normalize_var_name(var))
+            if match is not None:
+                issues.append((ERROR, f"Variable {{{{${var}}}}} does not match the case of input {match!r} (run fix_skill_inputs.py)."))
+            else:
+                issues.append((ERROR, f"Variable {{{{${var}}}}} has no matching input."))
+    for name in input_names:
+        if name not in variables:
+            issues.append((WARNING, f"Input {name!r} is not used in the prompt."))
+    return issues
+
+def check_inputs(inputs):
+    """Check the inputs section. Returns (issues, input_names)."""
+    issues = []
+    input_names = []
+    for position, item in enumerate(inputs, 1):
+        name = item.get('name')
+        if name is None or name == '':
+            issues.append((ERROR, f"Input {position} has no name."))
+            continue
+        name = str(name)
+        if not VARIABLE_NAME_PATTERN.match(name):
+            hint = " (it looks like a {{...}} block from the prompt, not an input)" if '{{' in name else ''
+            issues.append((ERROR, f"Input {position} has an invalid name {name!r}{hint}."))
+            continue
+        if name in input_names:
+            issues.append((ERROR, f"Input {name!r} is defined more than once."))
+        input_names.append(name)
+        for field in INPUT_FIELDS[1:]:
+            if field not in item:
+                issues.append((WARNING, f"Input {name!r} has no {field}."))
+        if 'required' in item and not isinstance(item['required'], bool):
+            issues.append((ERROR, f"Input {name!r} has a non-boolean required: {item['required']!r}."))
+    return issues, input_names
+
+def check_stop(stop):
+    """Check the stop setting, which is a string or a list of strings."""
+    if isinstance(stop, str):
+        stop = [stop]
+    if not isinstance(stop, list):
+        return [(ERROR, f"Setting stop must be a string or a list of strings, not {stop!r}.")]
+    if not stop:
+        return [(ERROR, "Setting stop is an empty list.")]
+    issues = []
+    for sequence in stop:
+        if not isinstance(sequence, str):
+            issues.append((ERROR, f"Stop sequence {sequence!r} is not a string (quote it)."))
+        elif not sequence:
+            issues.append((ERROR, "Stop sequence is empty."))
+    if len(set(map(str, stop))) != len(stop):
+        issues.append((WARNING, "Stop sequences contain duplicates."))
+    if len(stop) > MAX_STOP_SEQUENCES:
+        issues.append((WARNING, f"{len(stop)} stop sequences, the completion API accepts at most {MAX_STOP_SEQUENCES}."))
+    return issues
+
+def check_settings(settings):
+    """Check the types and ranges of the model settings."""
+    issues = []
+    for key, (types, minimum, maximum) in NUMERIC_SETTINGS.items():
+        if key not in settings:
+            continue
+        value = settings[key]
+        if isinstance(value, bool) or not isinstance(value, types):
+            issues.append((ERROR, f"Setting {key} must be {'an integer' if types == (int,) else 'a number'}, not {value!r}."))
+        elif (minimum is not None and value < minimum) or (maximum is not None and value > maximum):
+            issues.append((ERROR, f"Setting {key} is {value}, outside [{minimum}, {maximum if maximum is not None else ''}]."))
+    for key in BOOLEAN_SETTINGS:
+        if key in settings and not isinstance(settings[key], bool):
+            issues.append((ERROR, f"Setting {key} must be True or False, not {settings[key]!r}."))
+    if 'model' in settings and (not isinstance(settings['model'], str) or not settings['model']):
+        issues.append((ERROR, f"Setting model must be a model name, not {settings['model']!r}."))
+    if 'stop' in settings:
+        issues += check_stop(settings['stop'])
+    return issues
+
+def validate_skill_content(content):
+    """
+    Run every per-file check on the text of a .skill file.
+    Returns (name, issues): the name field (None if missing) and a list of (level, message) tuples.
+    """
+    lines = content.splitlines(keepends=True)
+    sections = split_sections(lines)
+    issues = []
+    fields = {}
+    seen = set()
+    for key, inline, start, end in sections:
+        if key in seen:
+            issues.append((ERROR, f"Field {key!r} appears more than once."))
+        seen.add(key)
+        if key not in KNOWN_FIELDS:
+            issues.append((WARNING, f"Unknown field {key!r}."))
+        fields[key] = (inline, lines[start + 1:end])
+    for field in REQUIRED_FIELDS:
+        if field not in fields:
+            issues.append((ERROR, f"Missing required field {field!r}."))
+
+    name = None
+    if 'name' in fields:
+        name = str(parse_scalar(fields['name'][0]))
+        if not name:
+            issues.append((ERROR, "The name field is empty."))
+            name = None
+    if 'description' in fields and not str(parse_scalar(fields['description'][0])):
+        issues.append((WARNING, "The description is empty."))
+    if 'skill_class' in fields and parse_scalar(fields['skill_class'][0]) not in SKILL_CLASSES:
+        issues.append((ERROR, f"Unknown skill_class {fields['skill_class'][0]!r}."))
+
+    input_issues, input_names = check_inputs(parse_inputs(fields['inputs'][1]) if 'inputs' in fields else [])
+    issues += input_issues
+    if PROMPT_KEY in fields:
+        header, body = fields[PROMPT_KEY]
+        issues += check_prompt(dedent_block(''.join(body), header or '|'), input_names)
+    if 'settings' in fields:
+        issues += check_settings(parse_settings(fields['settings'][1]))
+    return name, issues
+
+def validate_batch(contents):
+    """Validate a list of file contents. Used as a unit of work for the process pool."""
+    return [validate_skill_content(content) for content in contents]
+
+def validate_contents(contents, workers=None):
+    """Validate many file contents, spreading batches across a process pool."""
+    batches = [contents[i:i + FILES_PER_TASK] for i in range(0, len(contents), FILES_PER_TASK)]
+    if workers == 1 or len(batches) <= 1:
+        return [result for batch in batches for result in validate_batch(batch)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return [result for results in executor.map(validate_batch, batches) for result in results]
+
+def get_content_hash(content):
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+def load_validate_cache(cache_path):
+    """Load cached results from disk. Results from another validator version are dropped."""
+    if not cache_path or not os.path.isfile(cache_path):
+        return {}
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable validation cache {cache_path}: {e}")
+        return {}
+    if cache.get('version') != VALIDATOR_VERSION:
+        return {}
+    return cache.get('results', {})
+
+def save_validate_cache(cache_path, results):
+    """Save cached results to disk, replacing the file atomically."""
+    temp_path = cache_path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': VALIDATOR_VERSION, 'results': results}, f)
+    os.replace(temp_path, cache_path)
+
+def validate_directory(skills_dir, workers=None, cache_path=None):
+    """
+    Validate every .skill file under the directory.
+    Returns (issues, checked, total): a dict of path to its list of (level, message), how many files had to be
+    checked because they were not in the cache, and how many files there are.
+    """
+    skills_dir = os.path.abspath(skills_dir)
+    cache = load_validate_cache(cache_path)
+    issues = {}
+    files = []
+    uncached = {}
+    with phase('walk'):
+        skill_paths = list(iter_skill_files(skills_dir))
+    with phase('read'):
+        for path in skill_paths:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    content = f.read()
+            except (OSError, UnicodeDecodeError) as e:
+                issues[path] = [(ERROR, f"Could not read file: {e}")]
+                continue
+            content_hash = get_content_hash(content)
+            files.append((path, content_hash))
+            if content_hash not in cache:
+                uncached[content_hash] = content
+
+    hashes = list(uncached)
+    with phase('validate'):
+        results = validate_contents([uncached[content_hash] for content_hash in hashes], workers)
+    for content_hash, (name, file_issues) in zip(hashes, results):
+        cache[content_hash] = {'name': name, 'issues': file_issues}
+    if cache_path and hashes:
+        # Keep only the results of files that are still in the tree.
+        current = set(content_hash for _, content_hash in files)
+        with phase('write'):
+            save_validate_cache(cache_path, {content_hash: result for content_hash, result in cache.items() if content_hash in current})
+    instrumentation.count('skill_files', len(files))
+    instrumentation.count('skill_files_validated', len(hashes))
+
+    owners = {}
+    for path, content_hash in files:
+        result = cache[content_hash]
+        if result['issues']:
+            issues[path] = [tuple(issue) for issue in result['issues']]
+        name = result['name'] or os.path.splitext(os.path.basename(path))[0]
+        category = get_category_from_path(path, skills_dir)
+        owners.setdefault(f"{category}.{name}" if category else name, []).append(path)
+    for key, paths in owners.items():
+        if len(paths) < 2:
+            continue
+        for path in paths:
+            others = ', '.join(os.path.relpath(other, skills_dir) for other in paths if other != path)
+            issues.setdefault(path, []).append((ERROR, f"Skill key {key!r} is also used by {others}."))
+    return issues, len(hashes), len(files)
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate every .skill file in a Skills directory.")
+    parser.add_argument("--skills", required=True, help="Path to directory containing .skill files.")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes. Defaults to the CPU count.")
+    parser.add_argument("--cache", default=VALIDATE_CACHE_FILE, help="File used to cache results by content hash.")
+    parser.add_argument("--no_cache", action="store_true", help="Do not read or write the validation cache.")
+    parser.add_argument("--strict", action="store_true", help="Exit with status 1 on warnings as well as errors.")
+    parser.add_argument("--quiet", action="store_true", help="Only print errors.")
+    parser.add_argument("--json", action="store_true", help="Print the issues as JSON.")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    instrumentation.setup(args)
+
+    if not os.path.isdir(args.skills):
+        print(f"Directory {args.skills} not found.")
+        sys.exit(1)
+    issues, checked, total = validate_directory(args.skills, args.workers, None if args.no_cache else args.cache)
+    errors = sum(1 for file_issues in issues.values() for level, _ in file_issues if level == ERROR)
+    warnings = sum(1 for file_issues in issues.values() for level, _ in file_issues if level == WARNING)
+
+    if args.json:
+        print(json.dumps({os.path.relpath(path, args.skills): [{'level': level, 'message': message} for level, message in file_issues]
+                          for path, file_issues in sorted(issues.items())}, indent=2))
+    else:
+        for path, file_issues in sorted(issues.items()):
+            for level, message in file_issues:
+                if level == ERROR or not args.quiet:
+                    print(f"{os.path.relpath(path, args.skills)}: {level}: {message}")
+        print(f"{total} skills, {checked} checked, {errors} errors, {warnings} warnings.")
+    if errors or (args.strict and warnings):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
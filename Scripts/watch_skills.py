@@ -0,0 +1,330 @@
+#!/usr/bin/env python
+"""
+Script to keep derived skill artifacts up to date while skills are being edited.
+Builds everything once, then with --watch polls the Skills tree for changed .skill, skprompt.txt, config.json
+and description.toml files. Bursts of edits are debounced, and only the outputs affected by the changed files
+are recomputed: converted/copied .skill files, corrected inputs, token counts, the search index and,
+optionally, descriptions for skills that lack one.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+import convert_to_skill_format as converter
+import fix_skill_inputs
+import token_counter
+from skill_registry import SKILL_EXTENSION, get_category_from_path, index_skill_file
+from skill_search import load_index
+import instrumentation
+
+WATCHED_FILES = ('skprompt.txt', 'config.json', 'description.toml')
+POLL_INTERVAL = 1.0
+DEBOUNCE_SECONDS = 0.5
+
+
+def is_watched(file_name):
+    """Check whether a file is one the derived artifacts depend on."""
+    return file_name.endswith(SKILL_EXTENSION) or file_name in WATCHED_FILES
+
+def take_snapshot(directory, ignore=()):
+    """Map the path of every watched file under the directory to its (mtime, size)."""
+    snapshot = {}
+    stack = [directory]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name != '.git' and entry.path not in ignore:
+                            stack.append(entry.path)
+                    elif is_watched(entry.name):
+                        try:
+                            stat = entry.stat()
+                        except OSError:
+                            continue
+                        snapshot[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            continue
+    return snapshot
+
+def diff_snapshots(old, new):
+    """Return (changed, removed) paths between two snapshots. Added files count as changed."""
+    changed = set(path for path, stat in new.items() if old.get(path) != stat)
+    removed = set(path for path in old if path not in new)
+    return changed, removed
+
+
+class SkillWatcher:
+    """Recomputes derived artifacts for the files that changed under a Skills directory."""
+
+    def __init__(self, skills_dir, output_dir=None, fix=True, tokens_path=None, index_path=None,
+                 describe_template=None):
+        self.skills_dir = os.path.abspath(skills_dir)
+        self.output_dir = os.path.abspath(output_dir) if output_dir else None
+        self.fix = fix
+        self.tokens_path = tokens_path
+        self.index_path = index_path
+        self.describe_template = describe_template
+        self.token_counts = {}
+        self.index = None
+        self.describer = None
+        self.description_cache = None
+        self.ignore = [self.output_dir] if self.output_dir else []
+        self.snapshot = {}
+
+    def build_all(self):
+        """Build every artifact from scratch (reusing the converter manifest and token cache), then record the tree state."""
+        if self.fix:
+            paths = [path for path in take_snapshot(self.skills_dir, self.ignore) if path.endswith(SKILL_EXTENSION)]
+            self.report_fixes(fix_skill_inputs.fix_skill_files(paths))
+        if self.output_dir:
+            os.makedirs(self.output_dir, exist_ok=True)
+            converted, skipped = converter.search_directories(self.skills_dir, self.output_dir, ignore=self.ignore)
+            print(f"Converted {converted} skills, skipped {skipped}.")
+        if self.tokens_path:
+            self.count_all_tokens()
+        if self.index_path:
+            self.index = load_index(self.skills_dir, self.index_path, self.ignore)
+            print(f"Search index holds {len(self.index)} skills.")
+        if self.describe_template:
+            for directory in self.find_undescribed(take_snapshot(self.skills_dir, self.ignore)):
+                self.describe(directory)
+        self.snapshot = take_snapshot(self.skills_dir, self.ignore)
+
+    def poll(self):
+        """Return the (changed, removed) files since the last poll."""
+        snapshot = take_snapshot(self.skills_dir, self.ignore)
+        changed, removed = diff_snapshots(self.snapshot, snapshot)
+        self.snapshot = snapshot
+        return changed, removed
+
+    def wait_for_changes(self, interval=POLL_INTERVAL, debounce=DEBOUNCE_SECONDS):
+        """Block until files change, then keep collecting changes until the tree has been quiet for the debounce period."""
+        changed, removed = set(), set()
+        while not changed and not removed:
+            time.sleep(interval)
+            changed, removed = self.poll()
+        while True:
+            time.sleep(debounce)
+            more_changed, more_removed = self.poll()
+            if not more_changed and not more_removed:
+                break
+            changed |= more_changed
+            removed |= more_removed
+            removed -= more_changed
+            changed -= more_removed
+        return changed, removed
+
+    def handle_changes(self, changed, removed):
+        """Recompute the outputs affected by changed and removed files."""
+        skill_files = sorted(path for path in changed if path.endswith(SKILL_EXTENSION))
+        legacy_dirs = sorted(set(os.path.dirname(path) for path in changed if not path.endswith(SKILL_EXTENSION)))
+
+        if self.fix and skill_files:
+            # The fixed files are what the steps below read, so the fixer's own writes are not changes to pick up again.
+            self.update_snapshot(self.report_fixes(fix_skill_inputs.fix_skill_files(skill_files, workers=1)))
+
+        if self.output_dir:
+            self.remove_outputs(removed)
+            sources = skill_files + [directory for directory in legacy_dirs if converter.has_skill_files(directory)]
+            self.convert(sources)
+
+        if self.tokens_path:
+            prompt_paths = skill_files + [os.path.join(directory, 'skprompt.txt') for directory in legacy_dirs
+                                          if os.path.isfile(os.path.join(directory, 'skprompt.txt'))]
+            for path in removed:
+                self.token_counts.pop(path, None)
+            self.count_tokens(prompt_paths)
+            self.save_token_report()
+
+        if self.index is not None:
+            for path in removed:
+                if path.endswith(SKILL_EXTENSION):
+                    self.index.remove_path(path)
+            # Duplicates of a removed skill can take its key now.
+            freed = sorted(path for path, (key, _) in self.index.duplicates.items()
+                           if key not in self.index.documents and path not in skill_files)
+            for path in skill_files + freed:
+                self.index.remove_path(path)
+                try:
+                    entry = index_skill_file(path, self.skills_dir)
+                except (OSError, UnicodeDecodeError) as e:
+                    print(f"Error indexing {path}: {e}")
+                    continue
+                if not self.index.add(entry):
+                    print(f"Skipping {path}: skill {entry.key} is already indexed from {self.index.documents[entry.key][0]}")
+            self.index.save(self.index_path)
+            print(f"Search index updated for {len(skill_files) + len(freed)} skills.")
+
+        if self.describe_template:
+            for directory in self.find_undescribed(changed):
+                self.describe(directory)
+
+        for path in sorted(removed):
+            print(f"Removed: {path}")
+
+    def report_fixes(self, results):
+        """Print the files whose inputs were fixed and return their paths."""
+        fixed = []
+        for path, status, _ in results:
+            if status == 'fixed':
+                print(f"Fixed inputs: {path}")
+                fixed.append(path)
+        return fixed
+
+    def update_snapshot(self, paths):
+        """Record the current state of files the watcher wrote itself, so the next poll does not report them."""
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                self.snapshot.pop(path, None)
+                continue
+            self.snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+
+    def convert(self, sources):
+        """Convert or copy the given sources and record them in the converter manifest."""
+        if not sources:
+            return
+        manifest = converter.load_manifest(self.output_dir)
+        for source in sources:
+            key = os.path.relpath(source, self.skills_dir)
+            previous = manifest.get(key, {})
+            status, source_hash = converter.process_source(source, self.output_dir, self.skills_dir, previous.get('hash'))
+            if status == 'failed':
+                continue
+            manifest[key] = {'hash': source_hash, 'stats': converter.get_source_stats(source)}
+        converter.save_manifest(self.output_dir, manifest)
+
+    def remove_outputs(self, removed):
+        """Delete the converted or copied output of every source that no longer exists and drop it from the manifest."""
+        sources = sorted(path for path in removed if path.endswith(SKILL_EXTENSION))
+        sources += sorted(directory for directory in set(os.path.dirname(path) for path in removed if not path.endswith(SKILL_EXTENSION))
+                          if not converter.has_skill_files(directory))
+        if not sources:
+            return
+        manifest = converter.load_manifest(self.output_dir)
+        changed = False
+        for source in sources:
+            # Only sources the manifest knows about produced an output, anything else is another source's file.
+            if manifest.pop(os.path.relpath(source, self.skills_dir), None) is None:
+                continue
+            changed = True
+            output_path = converter.get_output_path(source, self.output_dir, self.skills_dir)
+            if os.path.abspath(output_path) != os.path.abspath(source) and os.path.isfile(output_path):
+                os.remove(output_path)
+                print(f"Removed output: {output_path}")
+        if changed:
+            converter.save_manifest(self.output_dir, manifest)
+
+    def count_all_tokens(self):
+        """Count tokens for every prompt in the tree."""
+        paths = [path for path in take_snapshot(self.skills_dir, self.ignore)
+                 if path.endswith(SKILL_EXTENSION) or os.path.basename(path) == 'skprompt.txt']
+        self.count_tokens(paths)
+        self.save_token_report()
+
+    def count_tokens(self, prompt_paths):
+        """Update token counts for the given prompt files, using the token counter's hash cache."""
+        if not prompt_paths:
+            return
+        cache = token_counter.load_token_cache(token_counter.TOKEN_CACHE_FILE)
+        templates = {}
+        for path in prompt_paths:
+            try:
+                template = token_counter.read_prompt(path)
+            except (OSError, UnicodeDecodeError) as e:
+                print(f"Error reading {path}: {e}")
+                continue
+            templates[path] = (token_counter.get_prompt_hash(template), template)
+        uncached = {prompt_hash: template for prompt_hash, template in templates.values() if prompt_hash not in cache}
+        if uncached:
+            hashes = list(uncached)
+            cache.update(zip(hashes, token_counter.count_templates([uncached[prompt_hash] for prompt_hash in hashes], workers=1)))
+            token_counter.save_token_cache(token_counter.TOKEN_CACHE_FILE, cache)
+        for path, (prompt_hash, _) in templates.items():
+            self.token_counts[path] = cache[prompt_hash]
+
+    def save_token_report(self):
+        """Write the token counts as a per-file and per-category JSON report."""
+        categories = {}
+        files = []
+        for path, tokens in sorted(self.token_counts.items()):
+            category = get_category_from_path(path if path.endswith(SKILL_EXTENSION) else os.path.dirname(path), self.skills_dir)
+            files.append({'path': os.path.relpath(path, self.skills_dir), 'category': category, 'tokens': tokens})
+            totals = categories.setdefault(category, {'files': 0, 'tokens': 0})
+            totals['files'] += 1
+            totals['tokens'] += tokens
+        total = sum(self.token_counts.values())
+        report = {
+            'directory': self.skills_dir,
+            'model': token_counter.TOKEN_MODEL,
+            'total_tokens': total,
+            'estimated_price': token_counter.get_estimated_price(total),
+            'categories': categories,
+            'files': files,
+        }
+        temp_path = self.tokens_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        os.replace(temp_path, self.tokens_path)
+        print(f"Token report updated: {total} tokens.")
+
+    def find_undescribed(self, paths):
+        """Legacy skill folders among the given files that have a skprompt.txt but no description.toml."""
+        directories = set(os.path.dirname(path) for path in paths if os.path.basename(path) == 'skprompt.txt')
+        return sorted(directory for directory in directories
+                      if not os.path.isfile(os.path.join(directory, 'description.toml')))
+
+    def describe(self, directory):
+        """Generate a description for one legacy skill folder."""
+        if self.describer is None:
+            import generate_description_file
+            self.describer = generate_description_file
+            self.description_cache = generate_description_file.DiskCache(generate_description_file.DESCRIPTION_CACHE_DIR)
+        try:
+            print(f"Describing {directory}")
+            self.describer.main(directory, self.describe_template, self.description_cache)
+        except Exception as e:
+            print(f"Failed to describe {directory}: {e}")
+
+    def watch(self, interval=POLL_INTERVAL, debounce=DEBOUNCE_SECONDS):
+        """Rebuild affected outputs every time files change, until interrupted."""
+        print(f"Watching {self.skills_dir} for changes. Press Ctrl+C to stop.")
+        while True:
+            changed, removed = self.wait_for_changes(interval, debounce)
+            print(f"\n{len(changed)} files changed, {len(removed)} removed.")
+            with instrumentation.phase('rebuild'):
+                self.handle_changes(changed, removed)
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild derived skill artifacts, optionally watching for changes.")
+    parser.add_argument("--skills", required=True, help="Path to the Skills directory.")
+    parser.add_argument("-o", "--output", help="Output directory for converted .skill files.")
+    parser.add_argument("--no_fix", action="store_true", help="Do not correct input names in .skill files.")
+    parser.add_argument("--tokens", help="File to write the token count report to.")
+    parser.add_argument("--index", help="File to keep the search index in.")
+    parser.add_argument("--describe_template", help="Describe template location. Legacy skills without a description.toml are described.")
+    parser.add_argument("--watch", action="store_true", help="Keep running and rebuild affected outputs whenever files change.")
+    parser.add_argument("--interval", type=float, default=POLL_INTERVAL, help="Seconds between polls.")
+    parser.add_argument("--debounce", type=float, default=DEBOUNCE_SECONDS, help="Seconds the tree must be quiet before rebuilding.")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    instrumentation.setup(args)
+
+    if not os.path.isdir(args.skills):
+        print(f"Error: {args.skills} is not a valid directory")
+        sys.exit(1)
+    watcher = SkillWatcher(args.skills, args.output, not args.no_fix, args.tokens, args.index, args.describe_template)
+    watcher.build_all()
+    if args.watch:
+        try:
+            watcher.watch(args.interval, args.debounce)
+        except KeyboardInterrupt:
+            print("\nStopped watching.")
+
+if __name__ == "__main__":
+    main()